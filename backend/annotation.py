@@ -0,0 +1,110 @@
+import numpy as np
+from scipy import sparse
+
+# Bulk EC annotation: the similarity graph and the EC labels are pulled once
+# into sparse matrices, weighted neighbor votes for every unlabelled protein come
+# from one sparse product, and the top-N predictions are written back in batches.
+
+
+def split_ec(ec_number):
+    return [ec.strip() for ec in ec_number.split(";") if ec.strip()] if ec_number else []
+
+
+def ec_label_matrix(ec_numbers):
+    # Protein x EC matrix; repeated ECs in one annotation count repeatedly
+    labels = {}
+    rows, cols = [], []
+    for i, ec_number in enumerate(ec_numbers):
+        for ec in split_ec(ec_number):
+            rows.append(i)
+            cols.append(labels.setdefault(ec, len(labels)))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(ec_numbers), len(labels))
+    )
+    return matrix, list(labels)
+
+
+def similarity_matrix(n, sources, targets, weights, threshold=0.0):
+    # Symmetric CSR adjacency over the SIMILARITY edges at or above threshold
+    sources, targets, weights = np.asarray(sources), np.asarray(targets), np.asarray(weights, dtype=np.float64)
+    keep = weights >= threshold
+    sources, targets, weights = sources[keep], targets[keep], weights[keep]
+    return sparse.csr_matrix(
+        (np.concatenate([weights, weights]),
+         (np.concatenate([sources, targets]), np.concatenate([targets, sources]))),
+        shape=(n, n),
+    )
+
+
+def graph_arrays_from_compact(compact):
+    sources, targets, weights = compact.edge_arrays()
+    return (compact.entries, compact.attributes['ec_number'], sources.astype(np.int64),
+            targets.astype(np.int64), weights.astype(np.float64))
+
+
+def graph_arrays_from_neo4j(driver, threshold=0.0):
+    with driver.session() as session:
+        proteins = session.run(
+            "MATCH (p:Protein) RETURN p.entry AS entry, p.ec_number AS ec_number"
+        ).data()
+        entries = [record["entry"] for record in proteins]
+        ec_numbers = [record["ec_number"] for record in proteins]
+        position = {entry: i for i, entry in enumerate(entries)}
+        sources, targets, weights = [], [], []
+        result = session.run(
+            """
+            MATCH (a:Protein)-[r:SIMILARITY]->(b:Protein)
+            WHERE r.weight >= $threshold
+            RETURN a.entry AS source, b.entry AS target, r.weight AS weight
+            """,
+            threshold=threshold,
+        )
+        for record in result:
+            sources.append(position[record["source"]])
+            targets.append(position[record["target"]])
+            weights.append(record["weight"])
+    return (entries, ec_numbers, np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64), np.array(weights, dtype=np.float64))
+
+
+def top_predictions(scores, labels, top_n=5, min_weight=0.0):
+    # Per row of a sparse score matrix: [(ec, weight), ...] heaviest first, ties by EC
+    scores = scores.tocsr()
+    predictions = []
+    for i in range(scores.shape[0]):
+        start, stop = scores.indptr[i], scores.indptr[i + 1]
+        values, cols = scores.data[start:stop], scores.indices[start:stop]
+        keep = values >= min_weight
+        ranked = sorted(zip(values[keep].tolist(), cols[keep].tolist()), key=lambda x: (-x[0], labels[x[1]]))
+        predictions.append([(labels[c], v) for v, c in ranked[:top_n]])
+    return predictions
+
+
+def predict_unlabelled(entries, ec_numbers, sources, targets, weights,
+                       similarity_threshold=0.2, top_n=5, min_weight=0.1):
+    adjacency = similarity_matrix(len(entries), sources, targets, weights, similarity_threshold)
+    labels_matrix, labels = ec_label_matrix(ec_numbers)
+    unlabelled = np.array([i for i, ec in enumerate(ec_numbers) if not split_ec(ec)], dtype=np.int64)
+    scores = adjacency[unlabelled] @ labels_matrix
+    predictions = top_predictions(scores, labels, top_n=top_n, min_weight=min_weight)
+    return {entries[i]: prediction for i, prediction in zip(unlabelled.tolist(), predictions)}
+
+
+def write_predictions(driver, predictions, batch_size=5000):
+    def write_batch(tx, rows):
+        tx.run(
+            "UNWIND $rows AS row "
+            "MATCH (p:Protein {entry: row.entry}) "
+            "SET p.ec_predictions = row.ecs, "
+            "    p.ec_prediction_weights = row.weights",
+            rows=rows
+        )
+
+    rows = [
+        {'entry': entry, 'ecs': [ec for ec, _ in top], 'weights': [weight for _, weight in top]}
+        for entry, top in predictions.items()
+    ]
+    with driver.session() as session:
+        for start in range(0, len(rows), batch_size):
+            session.execute_write(write_batch, rows[start:start + batch_size])
+    return len(rows)
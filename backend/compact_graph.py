@@ -0,0 +1,132 @@
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+# Array-backed protein graph. Proteins are interned to integer ids (their
+# position in `entries`), InterPro domains are int32 ids into a shared
+# vocabulary stored CSR-style, and SIMILARITY edges are a symmetric CSR
+# adjacency with float32 weights. A networkx view is only built on request.
+
+NODE_ATTRIBUTES = ['entry_name', 'protein_names', 'gene_names', 'ec_number']
+
+
+class CompactGraph:
+    def __init__(self, entries, attributes, domain_vocabulary, domain_indptr, domain_indices,
+                 indptr=None, indices=None, weights=None):
+        self.entries = list(entries)
+        self.index = {entry: i for i, entry in enumerate(self.entries)}
+        self.attributes = {attr: list(attributes[attr]) for attr in NODE_ATTRIBUTES}
+        self.domain_vocabulary = list(domain_vocabulary)
+        self.domain_indptr = np.asarray(domain_indptr, dtype=np.int64)
+        self.domain_indices = np.asarray(domain_indices, dtype=np.int32)
+        n = len(self.entries)
+        self.indptr = np.zeros(n + 1, dtype=np.int64) if indptr is None else np.asarray(indptr, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32) if indices is None else np.asarray(indices, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+
+    @classmethod
+    def from_records(cls, entries, attributes, domain_lists):
+        vocabulary = sorted(set().union(*map(set, domain_lists))) if len(domain_lists) else []
+        domain_ids = {domain: k for k, domain in enumerate(vocabulary)}
+        unique_domains = [sorted(set(domains)) for domains in domain_lists]
+        indptr = np.zeros(len(unique_domains) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(domains) for domains in unique_domains])
+        indices = np.fromiter((domain_ids[domain] for domains in unique_domains for domain in domains),
+                              dtype=np.int32, count=int(indptr[-1]))
+        return cls(entries, attributes, vocabulary, indptr, indices)
+
+    @classmethod
+    def from_table(cls, data):
+        return cls.from_records(
+            data['Entry'].tolist(),
+            {
+                'entry_name': data['Entry Name'].tolist(),
+                'protein_names': data['Protein names'].tolist(),
+                'gene_names': data['Gene Names'].tolist(),
+                'ec_number': data['EC number'].tolist(),
+            },
+            data['InterPro_list'].tolist(),
+        )
+
+    @classmethod
+    def from_networkx(cls, graph):
+        nodes = list(graph.nodes(data=True))
+        compact = cls.from_records(
+            [entry for entry, _ in nodes],
+            {attr: [data[attr] for _, data in nodes] for attr in NODE_ATTRIBUTES},
+            [data['interpro_domains'] for _, data in nodes],
+        )
+        edges = list(graph.edges(data='weight'))
+        compact.set_edges(
+            np.array([compact.index[u] for u, _, _ in edges], dtype=np.int64),
+            np.array([compact.index[v] for _, v, _ in edges], dtype=np.int64),
+            np.array([w for _, _, w in edges], dtype=np.float64),
+        )
+        return compact
+
+    def set_edges(self, sources, targets, weights):
+        # Replaces the adjacency with the given undirected edges
+        n = len(self.entries)
+        sources, targets = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        adjacency = sparse.csr_matrix(
+            (np.concatenate([weights, weights]),
+             (np.concatenate([sources, targets]), np.concatenate([targets, sources]))),
+            shape=(n, n),
+        )
+        adjacency.sort_indices()
+        self.indptr = adjacency.indptr.astype(np.int64)
+        self.indices = adjacency.indices.astype(np.int32)
+        self.weights = adjacency.data.astype(np.float32)
+
+    def number_of_nodes(self):
+        return len(self.entries)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def adjacency(self):
+        n = len(self.entries)
+        return sparse.csr_matrix((self.weights, self.indices, self.indptr), shape=(n, n))
+
+    def neighbors(self, i):
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:stop], self.weights[start:stop]
+
+    def domain_ids(self, i):
+        return self.domain_indices[self.domain_indptr[i]:self.domain_indptr[i + 1]]
+
+    def domains(self, i):
+        return {self.domain_vocabulary[k] for k in self.domain_ids(i).tolist()}
+
+    def domain_sets(self):
+        return [self.domains(i) for i in range(len(self.entries))]
+
+    def node_data(self, i):
+        data = {attr: self.attributes[attr][i] for attr in NODE_ATTRIBUTES}
+        data['interpro_domains'] = self.domains(i)
+        return data
+
+    def edge_arrays(self):
+        # Each undirected edge once, as (sources, targets, weights) with source < target
+        sources = np.repeat(np.arange(len(self.entries), dtype=np.int32), self.degree())
+        upper = self.indices > sources
+        return sources[upper], self.indices[upper], self.weights[upper]
+
+    def nbytes(self):
+        return sum(array.nbytes for array in (
+            self.domain_indptr, self.domain_indices, self.indptr, self.indices, self.weights))
+
+    def to_networkx(self):
+        graph = nx.Graph()
+        for i, entry in enumerate(self.entries):
+            graph.add_node(entry, **self.node_data(i))
+        sources, targets, weights = self.edge_arrays()
+        graph.add_weighted_edges_from(
+            (self.entries[u], self.entries[v], w)
+            for u, v, w in zip(sources.tolist(), targets.tolist(), weights.tolist())
+        )
+        return graph
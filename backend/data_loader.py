@@ -1,78 +1,538 @@
-import pandas as pd
+import csv
+import gzip
+import hashlib
+import json
+import os
+import uuid
 import numpy as np
-import networkx as nx
-from itertools import combinations
-from neo4j import GraphDatabase
-from tqdm import tqdm
+import pandas as pd
+from itertools import islice
+from backend.annotation import graph_arrays_from_compact
+from backend.compact_graph import NODE_ATTRIBUTES, CompactGraph
+from backend.domain_index import DomainIndex
+from backend.graph_stats import compute_statistics, to_properties
+from backend.label_propagation import propagate_unlabelled
+from backend.neo4j_connection import get_driver
+from backend.protein_store import load_protein_table, save_protein_table
+from backend.search_index import NGramIndex
+from backend.snapshot import load_graph_snapshot, save_graph_snapshot, snapshot_key
+from backend.similarity import (
+    estimate_recall,
+    indexed_jaccard_edges,
+    lsh_collision_probability,
+    minhash_jaccard_edges,
+    parallel_jaccard_edges,
+    rescore_jaccard_edges,
+    sparse_jaccard_edges,
+    TopKSelector,
+)
+
+PROTEIN_COLUMNS = ['Entry', 'Entry Name', 'Protein names', 'Gene Names', 'EC number', 'InterPro']
+TABLE_COLUMNS = ['Entry', 'Entry Name', 'Protein names', 'Gene Names', 'EC number', 'InterPro_list']
+
+
+def iter_protein_chunks(file_path, chunk_size=50_000):
+    # Only the six columns we use are parsed, all as strings
+    reader = pd.read_csv(file_path, sep='\t', usecols=PROTEIN_COLUMNS,
+                         dtype={col: str for col in PROTEIN_COLUMNS}, chunksize=chunk_size)
+    for chunk in reader:
+        # Preprocessing
+        chunk = chunk.dropna(subset=['InterPro'])
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        chunk['InterPro_list'] = chunk['InterPro'].str.strip(';').str.split(';')
+        yield chunk[TABLE_COLUMNS]
+
 
 class ProteinGraph:
     def __init__(self):
-        self.graph = nx.Graph()
+        self.compact = CompactGraph.from_records([], {attr: [] for attr in NODE_ATTRIBUTES}, [])
+        self._graph_view = None
         self.driver = None
 
-    def load_data(self, file_path, sample_size=100):
-        # Load CSV
-        data = pd.read_csv(file_path, sep='\t')
-        # Preprocessing
-        protein_data_clean = data.dropna(subset=['InterPro']).copy()
-        for col in ['Entry', 'Entry Name', 'Protein names', 'Gene Names', 'EC number', 'InterPro']:
-            protein_data_clean[col] = protein_data_clean[col].replace({np.nan: None, 'NaN': None})
-        protein_data_clean['InterPro_list'] = protein_data_clean['InterPro'].apply(lambda x: x.strip(';').split(';'))
-        protein_data_final = protein_data_clean[['Entry', 'Entry Name', 'Protein names', 'Gene Names', 'EC number', 'InterPro_list']]
-        sample_data = protein_data_final.head(sample_size).reset_index(drop=True)
+    @property
+    def graph(self):
+        # networkx view of the compact graph, built on first access
+        if self._graph_view is None:
+            self._graph_view = self.compact.to_networkx()
+        return self._graph_view
+
+    def _set_compact(self, compact):
+        self.compact = compact
+        self._graph_view = None
+
+    def load_data(self, file_path, sample_size=100, chunk_size=50_000, cache_path=None, progress=None):
+        # Reuse the columnar cache of a previous parse when it covers this request.
+        # progress(counter, value), when given, is called with 'rows_parsed'
+        if cache_path:
+            cached = load_protein_table(cache_path, file_path, sample_size)
+            if cached is not None:
+                self.sample_data = cached
+                if progress is not None:
+                    progress('rows_parsed', len(cached))
+                return cached
+        # Stream the TSV in chunks and stop once sample_size proteins are parsed.
+        # Chunks are no larger than the sample, so a small sample only reads the
+        # head of the file; rows without InterPro are dropped, hence the loop.
+        # sample_size=None keeps every protein: the chunks are concatenated
+        # because the graph is built from the whole table and cached with it
+        if sample_size is not None:
+            chunk_size = max(1, min(chunk_size, sample_size))
+        chunks, rows, complete = [], 0, True
+        for chunk in iter_protein_chunks(file_path, chunk_size=chunk_size):
+            chunks.append(chunk)
+            rows += len(chunk)
+            if progress is not None:
+                progress('rows_parsed', rows)
+            if sample_size is not None and rows >= sample_size:
+                complete = False
+                break
+        if chunks:
+            protein_data_final = pd.concat(chunks).reset_index(drop=True)
+        else:
+            protein_data_final = pd.DataFrame(columns=TABLE_COLUMNS)
+        if cache_path:
+            save_protein_table(protein_data_final, cache_path, file_path, complete)
+        if sample_size is not None:
+            protein_data_final = protein_data_final.head(sample_size)
+        sample_data = protein_data_final.reset_index(drop=True)
         self.sample_data = sample_data
         return sample_data
 
-    def build_graph(self, similarity_threshold=0.3):
+    def build_graph(self, similarity_threshold=0.3, method='index', block_size=2048,
+                    num_bands=32, rows_per_band=2, recall_sample=200, workers=None,
+                    top_k=None, mutual=False, max_degree=None, progress=None):
         # Add nodes
-        for idx, row in self.sample_data.iterrows():
-            self.graph.add_node(row['Entry'],
-                                entry_name=row['Entry Name'],
-                                protein_names=row['Protein names'],
-                                gene_names=row['Gene Names'],
-                                ec_number=row['EC number'],
-                                interpro_domains=set(row['InterPro_list']))
+        self._set_compact(CompactGraph.from_table(self.sample_data))
         # Add edges
-        for (u, v) in tqdm(combinations(self.sample_data['Entry'], 2), total=(len(self.sample_data)*(len(self.sample_data)-1)//2)):
-            domains_u = self.graph.nodes[u]['interpro_domains']
-            domains_v = self.graph.nodes[v]['interpro_domains']
-            intersection = len(domains_u.intersection(domains_v))
-            union = len(domains_u.union(domains_v))
-            jaccard_similarity = intersection / union if union else 0
-            if jaccard_similarity >= similarity_threshold:
-                self.graph.add_edge(u, v, weight=jaccard_similarity)
-        return {
-            'Number of nodes': self.graph.number_of_nodes(),
-            'Number of edges': self.graph.number_of_edges()
+        domain_sets = self.compact.domain_sets()
+        if top_k is not None and similarity_threshold <= 0:
+            # kNN only: candidates still need one shared domain
+            similarity_threshold = np.finfo(float).tiny
+        if method == 'index':
+            # candidates from the InterPro domain -> proteins index
+            edges = indexed_jaccard_edges(domain_sets, similarity_threshold, progress=progress)
+        elif method == 'sparse':
+            # block-wise sparse products over the protein x domain matrix
+            edges = sparse_jaccard_edges(domain_sets, similarity_threshold, block_size=block_size,
+                                         progress=progress)
+        elif method == 'parallel':
+            # domain-index row shards scored across a process pool
+            edges = parallel_jaccard_edges(domain_sets, similarity_threshold, workers=workers,
+                                           progress=progress)
+        elif method == 'minhash':
+            # approximate: MinHash signatures + LSH banding, exact Jaccard on collisions
+            edges = list(minhash_jaccard_edges(domain_sets, similarity_threshold,
+                                               num_bands=num_bands, rows_per_band=rows_per_band,
+                                               progress=progress))
+        else:
+            raise ValueError(f"Unknown graph construction method: {method}")
+        if progress is not None:
+            # the engines report 'pairs_scored' (candidate pairs); 'similar_pairs'
+            # counts those above the threshold, before top-k
+            edges = _report_progress(edges, progress, 'similar_pairs')
+            if method == 'minhash':
+                edges = list(edges)
+        scored, selector = edges, None
+        if top_k is not None:
+            # keep only each protein's top_k neighbors above the threshold
+            selector = TopKSelector(len(domain_sets), top_k, mutual=mutual, max_degree=max_degree).add(edges)
+            edges = list(selector.edges())
+        self.compact.set_edges(*_edge_arrays(edges))
+        stats = {
+            'Number of nodes': self.compact.number_of_nodes(),
+            'Number of edges': self.compact.number_of_edges()
         }
+        if selector is not None:
+            edges_before = int(selector.degree_before.sum()) // 2
+            stats['Edges before top-k'] = edges_before
+            stats['Edge reduction'] = 1 - self.compact.number_of_edges() / edges_before if edges_before else 0.0
+            stats['Degree before top-k'] = _degree_summary(selector.degree_before)
+            stats['Degree after top-k'] = _degree_summary(self.compact.degree())
+        if method == 'minhash':
+            stats['Collision probability at threshold'] = lsh_collision_probability(
+                similarity_threshold, num_bands, rows_per_band)
+            stats['Estimated recall'] = estimate_recall(
+                domain_sets, scored, similarity_threshold, sample_size=recall_sample)
+        return stats
+
+    def save_snapshot(self, path):
+        save_graph_snapshot(self.compact, path)
+
+    def load_snapshot(self, path):
+        # Returns False on a cache miss so the caller can build the graph instead
+        if not os.path.exists(path):
+            return False
+        self._set_compact(load_graph_snapshot(path))
+        return True
+
+    def save_domain_index(self, directory):
+        # Memory-mappable domain -> protein posting lists for domain-set queries
+        index = DomainIndex.from_compact(self.compact)
+        index.save(directory)
+        return index
+
+    def propagate_labels(self, similarity_threshold=0.2, top_n=5, **options):
+        # EC label propagation on the in-memory graph; returns (predictions, model)
+        return propagate_unlabelled(*graph_arrays_from_compact(self.compact),
+                                    similarity_threshold=similarity_threshold, top_n=top_n, **options)
+
+    def build_search_index(self, n=3):
+        # In-process keyword index over the same fields as the Neo4j full-text index
+        return NGramIndex.from_compact(self.compact, n=n)
 
     def connect_neo4j(self, uri="bolt://localhost:7687", user="neo4j", password="12345678"):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-
-    def upload_to_neo4j(self):
-        def load_graph(tx, graph):
-            # Create nodes
-            for node, data in graph.nodes(data=True):
-                tx.run(
-                    "MERGE (p:Protein {entry: $entry}) "
-                    "SET p.entry_name = $entry_name, "
-                    "    p.protein_names = $protein_names, "
-                    "    p.gene_names = $gene_names, "
-                    "    p.ec_number = $ec_number",
-                    entry=node,
-                    entry_name=data['entry_name'],
-                    protein_names=data['protein_names'],
-                    gene_names=data['gene_names'],
-                    ec_number=data['ec_number']
-                )
-            # Create edges
-            for u, v, data in graph.edges(data=True):
-                tx.run(
-                    "MATCH (a:Protein {entry: $u}), (b:Protein {entry: $v}) "
-                    "MERGE (a)-[r:SIMILARITY {weight: $weight}]->(b)",
-                    u=u, v=v, weight=data['weight']
-                )
+        self.driver = get_driver(uri, user, password)
+
+    def get_graph_fingerprint(self):
+        # Fingerprint of the snapshot last uploaded in full, or None while an
+        # upload is in progress or was interrupted
+        with self.driver.session() as session:
+            record = session.run(
+                "MATCH (m:GraphMeta {name: 'protein_graph'}) "
+                "RETURN CASE WHEN m.uploading IS NULL THEN m.fingerprint END AS fingerprint"
+            ).single()
+            return record["fingerprint"] if record else None
+
+    def sync_to_neo4j(self, fingerprint, batch_size=5000, progress=None):
+        # Upload only when the database does not already hold this snapshot
+        if self.driver and self.get_graph_fingerprint() == fingerprint:
+            return False
+        self.upload_to_neo4j(batch_size=batch_size, fingerprint=fingerprint, progress=progress)
+        return True
+
+    def upload_to_neo4j(self, batch_size=5000, fingerprint=None, progress=None):
         if self.driver:
+            if progress is not None:
+                progress('edges_total', self.compact.number_of_edges())
             with self.driver.session() as session:
-                session.execute_write(load_graph, self.graph)
-            self.driver.close()
+                session.execute_write(_create_constraint)
+                session.execute_write(_create_search_indexes)
+                # Everything written now carries this upload's token. Marked
+                # first so an interrupted upload never looks complete; the
+                # previous fingerprint and version stay until the swap
+                upload = fingerprint or uuid.uuid4().hex
+                session.execute_write(_begin_upload, upload)
+                # Create nodes, one transaction per chunk
+                for rows in _chunks(_node_rows(self.compact, range(self.compact.number_of_nodes())), batch_size):
+                    session.execute_write(_merge_nodes, rows, upload)
+                # Create edges
+                uploaded = 0
+                for rows in _chunks(_edge_rows(self.compact, *self.compact.edge_arrays()), batch_size):
+                    session.execute_write(_merge_edges, rows, upload)
+                    uploaded += len(rows)
+                    if progress is not None:
+                        progress('edges_uploaded', uploaded)
+                # Proteins and edges of an older snapshot go before the
+                # database is stamped as holding this one
+                while session.execute_write(_delete_stale_edges, upload, batch_size):
+                    pass
+                while session.execute_write(_delete_stale_nodes, upload, batch_size):
+                    pass
+                session.execute_write(_set_fingerprint, fingerprint)
+                session.execute_write(_bump_version)
+                session.execute_write(_write_statistics, to_properties(compute_statistics(self.compact)))
+
+    def ingest_delta(self, file_path, similarity_threshold=0.3, sample_size=None, batch_size=5000,
+                     fingerprint=None, snapshot_dir='backend/data/snapshots'):
+        # Diff a new release against the current graph by Entry and attribute hash,
+        # rescore only proteins whose domain set is new or changed, and push just
+        # those node/edge upserts and deletions to Neo4j. The result is saved as
+        # the snapshot of the new release, so the next sync finds it up to date.
+        if fingerprint is None:
+            fingerprint = snapshot_key(file_path, sample_size=sample_size,
+                                       similarity_threshold=similarity_threshold)
+        incoming = CompactGraph.from_table(self.load_data(file_path, sample_size=sample_size))
+        old = self.compact
+        removed = [entry for entry in old.entries if entry not in incoming.index]
+        added, changed, rescored = [], [], []
+        for j, entry in enumerate(incoming.entries):
+            i = old.index.get(entry)
+            if i is None:
+                added.append(entry)
+                rescored.append(entry)
+                continue
+            before, after = old.node_data(i), incoming.node_data(j)
+            if _protein_hash(before) != _protein_hash(after):
+                changed.append(entry)
+                if before['interpro_domains'] != after['interpro_domains']:
+                    rescored.append(entry)
+
+        # Rebuild the compact graph: surviving proteins keep their order, new ones
+        # are appended, and old edges are kept unless they touch a removed or
+        # rescored protein
+        entries = [entry for entry in old.entries if entry in incoming.index] + added
+        rows = [incoming.index[entry] for entry in entries]
+        graph = CompactGraph.from_records(
+            entries,
+            {attr: [incoming.attributes[attr][r] for r in rows] for attr in NODE_ATTRIBUTES},
+            [incoming.domains(r) for r in rows],
+        )
+        stale = [entry for entry in rescored if entry in old.index]
+        remap = np.full(old.number_of_nodes(), -1, dtype=np.int64)
+        for entry in entries:
+            if entry in old.index:
+                remap[old.index[entry]] = graph.index[entry]
+        remap[[old.index[entry] for entry in stale]] = -1
+        sources, targets, weights = old.edge_arrays()
+        sources, targets = remap[sources], remap[targets]
+        kept = (sources >= 0) & (targets >= 0)
+        new_sources, new_targets, new_weights = _edge_arrays(rescore_jaccard_edges(
+            graph.domain_sets(), [graph.index[entry] for entry in rescored], similarity_threshold))
+        graph.set_edges(
+            np.concatenate([sources[kept], new_sources]),
+            np.concatenate([targets[kept], new_targets]),
+            np.concatenate([weights[kept], new_weights]),
+        )
+        self._set_compact(graph)
+        self.save_snapshot(f'{snapshot_dir}/{fingerprint}.npz')
+
+        if self.driver:
+            with self.driver.session() as session:
+                session.execute_write(_create_constraint)
+                session.execute_write(_create_search_indexes)
+                session.execute_write(_begin_upload, fingerprint)
+                for rows in _chunks(removed, batch_size):
+                    session.execute_write(_delete_nodes, rows)
+                for rows in _chunks(stale, batch_size):
+                    session.execute_write(_delete_edges, rows)
+                for rows in _chunks(_node_rows(graph, [graph.index[entry] for entry in added + changed]), batch_size):
+                    session.execute_write(_merge_nodes, rows)
+                for rows in _chunks(_edge_rows(graph, new_sources, new_targets, new_weights), batch_size):
+                    session.execute_write(_merge_edges, rows)
+                session.execute_write(_set_fingerprint, fingerprint)
+                session.execute_write(_bump_version)
+                session.execute_write(_write_statistics, to_properties(compute_statistics(self.compact)))
+
+        return {
+            'Added proteins': len(added),
+            'Changed proteins': len(changed),
+            'Removed proteins': len(removed),
+            'Rescored proteins': len(rescored),
+            'Removed edges': int((~kept).sum()),
+            'Added edges': len(new_sources),
+        }
+
+    def export_neo4j_csv(self, out_dir, chunk_size=1_000_000):
+        # Header + gzip data files for `neo4j-admin database import full`
+        os.makedirs(out_dir, exist_ok=True)
+
+        def write_part(prefix, header, rows):
+            header_path = os.path.join(out_dir, f"{prefix}_header.csv")
+            with open(header_path, 'w', newline='') as f:
+                csv.writer(f).writerow(header)
+            paths = [header_path]
+            for part, chunk in enumerate(_chunks(rows, chunk_size)):
+                path = os.path.join(out_dir, f"{prefix}_part{part:04d}.csv.gz")
+                with gzip.open(path, 'wt', newline='') as f:
+                    csv.writer(f).writerows(chunk)
+                paths.append(path)
+            return paths
+
+        node_files = write_part(
+            'proteins',
+            ['entry:ID(Protein)', 'entry_name', 'protein_names', 'gene_names', 'ec_number', ':LABEL'],
+            (
+                [row['entry'], row['entry_name'], row['protein_names'], row['gene_names'], row['ec_number'], 'Protein']
+                for row in _node_rows(self.compact, range(self.compact.number_of_nodes()))
+            )
+        )
+        edge_files = write_part(
+            'similarity',
+            [':START_ID(Protein)', ':END_ID(Protein)', 'weight:double', ':TYPE'],
+            (
+                [row['u'], row['v'], row['weight'], 'SIMILARITY']
+                for row in _edge_rows(self.compact, *self.compact.edge_arrays())
+            )
+        )
+        command = (
+            "neo4j-admin database import full neo4j "
+            f"--nodes={','.join(node_files)} "
+            f"--relationships={','.join(edge_files)}"
+        )
+        return {'nodes': node_files, 'relationships': edge_files, 'command': command}
+
+
+def _report_progress(edges, progress, counter, every=10_000):
+    count = 0
+    for edge in edges:
+        yield edge
+        count += 1
+        if count % every == 0:
+            progress(counter, count)
+    progress(counter, count)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _protein_hash(data):
+    payload = [data['entry_name'], data['protein_names'], data['gene_names'], data['ec_number'],
+               sorted(data['interpro_domains'])]
+    return hashlib.sha1(json.dumps(payload).encode()).hexdigest()
+
+
+def _degree_summary(degree):
+    if not len(degree):
+        return {}
+    return {
+        'min': int(degree.min()),
+        'median': float(np.median(degree)),
+        'mean': float(degree.mean()),
+        'p99': float(np.percentile(degree, 99)),
+        'max': int(degree.max()),
+    }
+
+
+def _edge_arrays(edges, chunk_size=1 << 16):
+    # (i, j, weight) tuples from an edge engine -> three flat arrays
+    sources, targets, weights = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+    for chunk in _chunks(edges, chunk_size):
+        i, j, w = zip(*chunk)
+        sources.append(np.array(i, dtype=np.int64))
+        targets.append(np.array(j, dtype=np.int64))
+        weights.append(np.array(w, dtype=np.float64))
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(weights)
+
+
+def _node_rows(compact, positions):
+    for i in positions:
+        yield {
+            'entry': compact.entries[i],
+            'entry_name': compact.attributes['entry_name'][i],
+            'protein_names': compact.attributes['protein_names'][i],
+            'gene_names': compact.attributes['gene_names'][i],
+            'ec_number': compact.attributes['ec_number'][i],
+        }
+
+
+def _edge_rows(compact, sources, targets, weights):
+    entries = compact.entries
+    for u, v, w in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+        yield {'u': entries[u], 'v': entries[v], 'weight': w}
+
+
+def _create_constraint(tx):
+    # Unique index on :Protein(entry) so the edge MATCHes are index lookups
+    tx.run(
+        "CREATE CONSTRAINT protein_entry IF NOT EXISTS "
+        "FOR (p:Protein) REQUIRE p.entry IS UNIQUE"
+    )
+
+
+def _create_search_indexes(tx):
+    # Full-text index behind keyword search plus a range index for exact names
+    tx.run(
+        "CREATE FULLTEXT INDEX protein_search IF NOT EXISTS "
+        "FOR (p:Protein) ON EACH [p.protein_names, p.gene_names, p.entry_name]"
+    )
+    tx.run(
+        "CREATE INDEX protein_names IF NOT EXISTS "
+        "FOR (p:Protein) ON (p.protein_names)"
+    )
+
+
+def _begin_upload(tx, upload):
+    tx.run(
+        "MERGE (m:GraphMeta {name: 'protein_graph'}) "
+        "SET m.uploading = $upload",
+        upload=upload
+    )
+
+
+def _set_fingerprint(tx, fingerprint):
+    # Ends the upload in progress; None when the graph matches no snapshot
+    tx.run(
+        "MERGE (m:GraphMeta {name: 'protein_graph'}) "
+        "SET m.fingerprint = $fingerprint "
+        "REMOVE m.uploading",
+        fingerprint=fingerprint
+    )
+
+
+def _bump_version(tx):
+    # Graph version stamp read by ProteinGraphQuery to invalidate its cache
+    tx.run(
+        "MERGE (m:GraphMeta {name: 'protein_graph'}) "
+        "SET m.version = coalesce(m.version, 0) + 1"
+    )
+
+
+def _write_statistics(tx, stats):
+    # Materialized page statistics, tagged with the graph version they describe
+    tx.run(
+        "MATCH (m:GraphMeta {name: 'protein_graph'}) "
+        "MERGE (s:GraphStats {name: 'protein_graph'}) "
+        "SET s += $stats, s.version = m.version",
+        stats=stats
+    )
+
+
+def _merge_nodes(tx, rows, upload=None):
+    # `upload` tags the rows of a full upload; delta updates leave it untouched
+    tx.run(
+        "UNWIND $rows AS row "
+        "MERGE (p:Protein {entry: row.entry}) "
+        "SET p.entry_name = row.entry_name, "
+        "    p.protein_names = row.protein_names, "
+        "    p.gene_names = row.gene_names, "
+        "    p.ec_number = row.ec_number, "
+        "    p.upload = coalesce($upload, p.upload)",
+        rows=rows, upload=upload
+    )
+
+
+def _merge_edges(tx, rows, upload=None):
+    tx.run(
+        "UNWIND $rows AS row "
+        "MATCH (a:Protein {entry: row.u}), (b:Protein {entry: row.v}) "
+        "MERGE (a)-[r:SIMILARITY]->(b) "
+        "SET r.weight = row.weight, "
+        "    r.upload = coalesce($upload, r.upload)",
+        rows=rows, upload=upload
+    )
+
+
+def _delete_stale_edges(tx, upload, limit):
+    # One batch of SIMILARITY edges not written by this upload; returns the count
+    record = tx.run(
+        "MATCH ()-[r:SIMILARITY]->() "
+        "WHERE r.upload IS NULL OR r.upload <> $upload "
+        "WITH r LIMIT $limit "
+        "DELETE r "
+        "RETURN count(r) AS deleted",
+        upload=upload, limit=limit
+    ).single()
+    return record["deleted"]
+
+
+def _delete_stale_nodes(tx, upload, limit):
+    record = tx.run(
+        "MATCH (p:Protein) "
+        "WHERE p.upload IS NULL OR p.upload <> $upload "
+        "WITH p LIMIT $limit "
+        "DETACH DELETE p "
+        "RETURN count(p) AS deleted",
+        upload=upload, limit=limit
+    ).single()
+    return record["deleted"]
+
+
+def _delete_nodes(tx, entries):
+    tx.run(
+        "UNWIND $entries AS entry "
+        "MATCH (p:Protein {entry: entry}) "
+        "DETACH DELETE p",
+        entries=entries
+    )
+
+
+def _delete_edges(tx, entries):
+    tx.run(
+        "UNWIND $entries AS entry "
+        "MATCH (:Protein {entry: entry})-[r:SIMILARITY]-() "
+        "DELETE r",
+        entries=entries
+    )
@@ -0,0 +1,107 @@
+import json
+import os
+import numpy as np
+from scipy import sparse
+
+# InterPro domain -> protein posting lists, saved as plain .npy arrays that are
+# memory-mapped on load. Domain-set queries are answered with prefix and size
+# filtering: only the rarest query domains generate candidates, and candidates
+# whose overlap can no longer reach the threshold are dropped while the
+# remaining posting lists are intersected.
+
+DOMAIN_INDEX_FORMAT = 1
+ARRAYS = ['post_indptr', 'postings', 'sizes']
+
+
+class DomainIndex:
+    def __init__(self, entries, vocabulary, post_indptr, postings, sizes):
+        self.entries = list(entries)
+        self.vocabulary = list(vocabulary)
+        self.domain_ids = {domain: k for k, domain in enumerate(self.vocabulary)}
+        self.post_indptr = post_indptr
+        self.postings = postings
+        self.sizes = sizes
+
+    @classmethod
+    def from_compact(cls, compact):
+        n, m = compact.number_of_nodes(), len(compact.domain_vocabulary)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(compact.domain_indices), dtype=np.int8), compact.domain_indices, compact.domain_indptr),
+            shape=(n, m),
+        )
+        inverted = matrix.T.tocsr()
+        inverted.sort_indices()
+        return cls(compact.entries, compact.domain_vocabulary, inverted.indptr.astype(np.int64),
+                   inverted.indices.astype(np.int32), np.diff(compact.domain_indptr).astype(np.int32))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            tmp_path = f"{path}.tmp.npy"
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, path)
+        # The manifest goes last, so a directory without one is incomplete
+        path = os.path.join(directory, "manifest.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"format": DOMAIN_INDEX_FORMAT, "entries": self.entries, "vocabulary": self.vocabulary}, f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, directory):
+        # None when no complete index of this format is stored there
+        path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != DOMAIN_INDEX_FORMAT:
+            return None
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in ARRAYS]
+        return cls(manifest["entries"], manifest["vocabulary"], *arrays)
+
+    def posting(self, k):
+        return self.postings[self.post_indptr[k]:self.post_indptr[k + 1]]
+
+    def search(self, domains, similarity_threshold=0.3, top_k=None):
+        # Proteins whose domain set has Jaccard >= similarity_threshold with
+        # `domains`, heaviest first, cut to top_k when given
+        query = set(domains)
+        q = len(query)
+        if q == 0:
+            return []
+        threshold = max(similarity_threshold, 1e-9)
+        # rarest domains first; unknown domains only count towards the union
+        known = sorted((self.domain_ids[d] for d in query if d in self.domain_ids),
+                       key=lambda k: self.post_indptr[k + 1] - self.post_indptr[k])
+        # a match shares at least ceil(t * q) domains, so one of any
+        # q - ceil(t * q) + 1 query domains; unknown domains fill the prefix first
+        prefix = q - int(np.ceil(threshold * q - 1e-9)) + 1 - (q - len(known))
+        if prefix <= 0:
+            return []
+        candidates = np.unique(np.concatenate([self.posting(k) for k in known[:prefix]]))
+        sizes = self.sizes[candidates]
+        # size filter: t * q <= |x| <= q / t
+        keep = (sizes >= threshold * q - 1e-9) & (sizes <= q / threshold + 1e-9)
+        candidates, sizes = candidates[keep], sizes[keep]
+        # overlap needed for Jaccard >= t is t / (1 + t) * (q + |x|)
+        required = threshold / (1 + threshold) * (q + sizes) - 1e-9
+        overlap = np.zeros(len(candidates), dtype=np.int64)
+        for remaining, k in zip(range(len(known) - 1, -1, -1), known):
+            posting = self.posting(k)
+            position = np.searchsorted(posting, candidates)
+            position[position >= len(posting)] = 0
+            overlap += posting[position] == candidates
+            # early termination: drop candidates that cannot catch up anymore
+            alive = overlap + remaining >= required
+            candidates, sizes, required, overlap = candidates[alive], sizes[alive], required[alive], overlap[alive]
+            if not len(candidates):
+                return []
+        scores = overlap / (q + sizes - overlap)
+        keep = scores >= similarity_threshold
+        candidates, scores, overlap = candidates[keep], scores[keep], overlap[keep]
+        order = np.lexsort((candidates, -scores))[:top_k]
+        return [
+            {"entry": self.entries[i], "score": float(score), "shared": int(shared)}
+            for i, score, shared in zip(candidates[order].tolist(), scores[order].tolist(), overlap[order].tolist())
+        ]
@@ -0,0 +1,174 @@
+import threading
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from backend.annotation import similarity_matrix
+from backend.graph_layout import cached_layout
+from backend.graph_sampling import sample_order, sample_page
+
+# Whole-graph analytics on a CSR export of the SIMILARITY graph: components,
+# degree and weight histograms, sampled clustering and label-propagation
+# communities, all as sparse/array operations. Exports are cached per graph
+# version so the statistics and visualization pages reuse them, together with
+# their layout positions.
+
+
+def component_labels(adjacency):
+    _, labels = csgraph.connected_components(adjacency, directed=False)
+    return labels
+
+
+def degree_histogram(adjacency):
+    # counts[d] = number of proteins with degree d
+    return np.bincount(np.diff(adjacency.indptr))
+
+
+def weight_histogram(adjacency, bins=20):
+    weights = sparse.triu(adjacency, k=1).data
+    return np.histogram(weights, bins=bins, range=(0.0, 1.0))
+
+
+def clustering_estimate(adjacency, sample_size=500, block_size=512, seed=0):
+    # Average local clustering and transitivity over a uniform node sample;
+    # triangles through i are (A[i] @ A) . A[i] / 2 on the unweighted adjacency
+    n = adjacency.shape[0]
+    if n == 0:
+        return 0.0, 0.0
+    binary = (adjacency > 0).astype(np.float64).tocsr()
+    sample = np.sort(np.random.default_rng(seed).choice(n, size=min(sample_size, n), replace=False))
+    degree = np.diff(binary.indptr)[sample].astype(np.float64)
+    triangles = np.zeros(len(sample))
+    for start in range(0, len(sample), block_size):
+        rows = binary[sample[start:start + block_size]]
+        triangles[start:start + block_size] = np.asarray((rows @ binary).multiply(rows).sum(axis=1)).ravel() / 2
+    pairs = degree * (degree - 1)
+    local = np.divide(2 * triangles, pairs, out=np.zeros_like(pairs), where=pairs > 0)
+    transitivity = 2 * triangles.sum() / pairs.sum() if pairs.sum() else 0.0
+    return float(local.mean()), float(transitivity)
+
+
+def label_propagation_communities(adjacency, max_iter=30, seed=0):
+    # Weighted label propagation: every protein adopts the label with the largest
+    # summed edge weight among its neighbours. Half of the proteins update per
+    # round (random mask), which keeps synchronous updates from oscillating.
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    coo = adjacency.tocoo()
+    rows, cols, weights = coo.row, coo.col, coo.data.astype(np.float64)
+    # a tiny vote for the current label keeps ties stable and isolated proteins put
+    tie = 1e-9
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n)
+    for _ in range(max_iter):
+        votes = sparse.csr_matrix(
+            (np.concatenate([weights, np.full(n, tie)]),
+             (np.concatenate([rows, np.arange(n)]), np.concatenate([labels[cols], labels]))),
+            shape=(n, n),
+        )
+        proposed = np.asarray(votes.argmax(axis=1)).ravel()
+        changed = proposed != labels
+        if not changed.any():
+            break
+        update = changed & (rng.random(n) < 0.5)
+        labels = np.where(update, proposed, labels)
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+
+def modularity(adjacency, labels):
+    total = adjacency.sum()
+    if total == 0:
+        return 0.0
+    coo = adjacency.tocoo()
+    inside = coo.data[labels[coo.row] == labels[coo.col]].sum()
+    strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    community_strength = np.bincount(labels, weights=strength)
+    return float(inside / total - ((community_strength / total) ** 2).sum())
+
+
+def compute_analytics(adjacency, top=20, clustering_sample=500, seed=0):
+    n = adjacency.shape[0]
+    components = component_labels(adjacency)
+    component_sizes = np.sort(np.bincount(components))[::-1] if n else np.zeros(0, dtype=np.int64)
+    communities = label_propagation_communities(adjacency, seed=seed)
+    community_sizes = np.sort(np.bincount(communities))[::-1] if n else np.zeros(0, dtype=np.int64)
+    degrees = degree_histogram(adjacency)
+    counts, bin_edges = weight_histogram(adjacency)
+    average_clustering, transitivity = clustering_estimate(adjacency, sample_size=clustering_sample, seed=seed)
+    return {
+        'nodes': n,
+        'edges': adjacency.nnz // 2,
+        'mean_degree': adjacency.nnz / n if n else 0.0,
+        'components': len(component_sizes),
+        'largest_component': int(component_sizes[0]) if n else 0,
+        'component_sizes': component_sizes[:top].tolist(),
+        'degree_histogram': {'degree': np.flatnonzero(degrees).tolist(), 'count': degrees[degrees > 0].tolist()},
+        'weight_histogram': {'bin_edges': bin_edges.tolist(), 'count': counts.tolist()},
+        'average_clustering': average_clustering,
+        'transitivity': transitivity,
+        'clustering_sample': min(clustering_sample, n),
+        'communities': len(community_sizes),
+        'community_sizes': community_sizes[:top].tolist(),
+        'modularity': modularity(adjacency, communities) if n else 0.0,
+    }
+
+
+class GraphExport:
+    def __init__(self, entries, adjacency):
+        self.entries = list(entries)
+        self.index = {entry: i for i, entry in enumerate(self.entries)}
+        self.adjacency = adjacency.tocsr()
+        self._analytics = None
+        self._positions = None
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_compact(cls, compact):
+        return cls(compact.entries, compact.adjacency())
+
+    @classmethod
+    def from_arrays(cls, entries, ec_numbers, sources, targets, weights):
+        return cls(entries, similarity_matrix(len(entries), sources, targets, weights))
+
+    def analytics(self):
+        with self._lock:
+            if self._analytics is None:
+                self._analytics = compute_analytics(self.adjacency)
+            return self._analytics
+
+    def positions(self):
+        with self._lock:
+            if self._positions is None:
+                self._positions = cached_layout(self.entries, self.adjacency)
+            return self._positions
+
+    def positions_of(self, entries):
+        # {entry: {"x": ..., "y": ...}} for the entries present in the export
+        positions = self.positions()
+        rows = [(entry, self.index[entry]) for entry in entries if entry in self.index]
+        return {entry: {"x": float(positions[i, 0]), "y": float(positions[i, 1])} for entry, i in rows}
+
+    def sample(self, budget, strategy='top-degree', offset=0, seed=0):
+        with self._lock:
+            key = (strategy, seed)
+            if key not in self._orders:
+                self._orders[key] = sample_order(self.adjacency, strategy, seed=seed)
+            order = self._orders[key]
+        return sample_page(self.adjacency, order, budget, offset)
+
+
+_exports = {}
+_exports_lock = threading.Lock()
+
+
+def cached_export(source, version, build):
+    # One export per data source, rebuilt when the graph version moves
+    with _exports_lock:
+        cached = _exports.get(source)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    export = build()
+    with _exports_lock:
+        _exports[source] = (version, export)
+    return export
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import numpy as np
+from scipy import sparse
+
+# Server-side force layout for the graph views. Positions are computed once per
+# graph content with a vectorized Fruchterman-Reingold pass (repulsion against a
+# random anchor sample, attraction along the weighted CSR edges), saved under
+# LAYOUT_DIR, and shipped to the browser with a preset layout.
+
+LAYOUT_DIR = 'backend/data/layouts'
+LAYOUT_FORMAT = 1
+
+# Cytoscape layout that keeps the positions sent with the elements
+PRESET_LAYOUT = {"name": "preset", "fit": True, "padding": 20, "animate": False}
+
+
+def force_layout(adjacency, iterations=100, repulsion_sample=256, gravity=1.0, scale=60.0,
+                 block_size=4096, seed=0):
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    # ideal edge length 1, proteins start spread over a sqrt(n) x sqrt(n) square
+    side = np.sqrt(n)
+    x, y = (rng.random((2, n)) - 0.5) * side
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    sources, targets, weights = upper.row, upper.col, upper.data.astype(np.float64)
+    temperature = side / 10
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        # repulsion 1/d from every protein, estimated from a random anchor sample
+        if n <= repulsion_sample:
+            anchors, factor = np.arange(n), 1.0
+        else:
+            anchors, factor = rng.choice(n, size=repulsion_sample, replace=False), n / repulsion_sample
+        anchor_x, anchor_y = x[anchors], y[anchors]
+        dx_total, dy_total = np.empty(n), np.empty(n)
+        for start in range(0, n, block_size):
+            dx = x[start:start + block_size, None] - anchor_x[None, :]
+            dy = y[start:start + block_size, None] - anchor_y[None, :]
+            inverse = factor / (dx * dx + dy * dy + 1e-9)
+            dx_total[start:start + block_size] = (dx * inverse).sum(axis=1)
+            dy_total[start:start + block_size] = (dy * inverse).sum(axis=1)
+        # attraction d^2 along each edge, scaled by its similarity
+        dx, dy = x[sources] - x[targets], y[sources] - y[targets]
+        pull = weights * np.sqrt(dx * dx + dy * dy)
+        for total, delta in ((dx_total, dx * pull), (dy_total, dy * pull)):
+            total += np.bincount(targets, weights=delta, minlength=n)
+            total -= np.bincount(sources, weights=delta, minlength=n)
+        # gravity keeps small components and isolated proteins near the centre
+        dx_total -= gravity * x
+        dy_total -= gravity * y
+        length = np.sqrt(dx_total * dx_total + dy_total * dy_total) + 1e-9
+        step = np.minimum(length, temperature) / length
+        x += dx_total * step
+        y += dy_total * step
+        temperature -= cooling
+    positions = np.column_stack([x - x.mean(), y - y.mean()])
+    return (positions * scale).astype(np.float32)
+
+
+def layout_key(entries, adjacency, **params):
+    digest = hashlib.sha256()
+    digest.update(f"{LAYOUT_FORMAT}:{sorted(params.items())}".encode())
+    digest.update("\n".join(entries).encode())
+    for array in (adjacency.indptr, adjacency.indices, adjacency.data):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:32]
+
+
+def cached_layout(entries, adjacency, directory=LAYOUT_DIR, **params):
+    # Positions aligned with `entries`, loaded from the cache file for this
+    # exact graph when present
+    path = os.path.join(directory, f"{layout_key(entries, adjacency, **params)}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+    positions = force_layout(adjacency, **params)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, positions)
+    os.replace(tmp_path, path)
+    return positions
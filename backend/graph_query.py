@@ -1,13 +1,28 @@
-from neo4j import GraphDatabase
+import re
 from collections import defaultdict
+from backend.annotation import graph_arrays_from_neo4j, predict_unlabelled, write_predictions
+from backend.graph_analytics import GraphExport, cached_export
+from backend.graph_stats import from_properties
+from backend.label_propagation import propagate_unlabelled
+from backend.neo4j_connection import get_driver
+from backend.query_cache import QUERY_CACHE
+
+
+def _fulltext_query(keyword):
+    # Every word must match, as a prefix. Words are split the way the standard
+    # analyzer tokenizes names ("Serine/threonine-protein" is three words),
+    # which also leaves no Lucene syntax to escape
+    return " AND ".join(f"{term}*" for term in re.findall(r'\w+', keyword.lower()))
 
 
 class ProteinGraphQuery:
     def __init__(self, uri="bolt://localhost:7687", user="neo4j", password="12345678"):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.uri = uri
+        self.driver = get_driver(uri, user, password)
 
     def close(self):
-        self.driver.close()
+        # The pooled driver is shared across pages and reruns, so it stays open
+        pass
 
     def get_full_graph(self, limit=100):
         with self.driver.session() as session:
@@ -39,63 +54,178 @@ class ProteinGraphQuery:
                     )
             return proteins, edges
 
-    def search_protein(self, entry_id=None, protein_name=None, protein_key=None):
+    def _export(self):
+        # CSR export of the whole graph, shared until the graph version moves
+        return cached_export(
+            ("neo4j", self.uri), self._graph_version(),
+            lambda: GraphExport.from_arrays(*graph_arrays_from_neo4j(self.driver)),
+        )
+
+    def get_graph_sample(self, budget=100, strategy="top-degree", offset=0, seed=0):
+        # `budget` proteins picked by the sampling strategy, starting at `offset`
+        # of its ranking, with each undirected edge to earlier pages once
+        export = self._export()
+        page, sources, targets, weights = export.sample(budget, strategy, offset, seed)
+        entries = [export.entries[i] for i in page.tolist()]
         with self.driver.session() as session:
-            # ---  Entry ID ---
-            if entry_id:
-                query = """
-                MATCH(p:Protein {entry: $entry})
-                OPTIONAL MATCH (p)-[:SIMILARITY]-(neighbor)
-                OPTIONAL MATCH (neighbor)-[r:SIMILARITY]-(second_neighbor)
-                RETURN p, 
-                    COLLECT(DISTINCT neighbor) AS direct_neighbors, 
-                    COLLECT(DISTINCT second_neighbor) AS second_neighbors,
-                    COLLECT(DISTINCT r) AS second_edges
-                """
-                params = {"entry": entry_id}
-                result = session.run(query, **params)
-                record = result.single()
-                if record and record["p"]:
-                    return self._process_protein_record(record)
-
-            # --- Full Name ---
-            if protein_name:
-                query = """
-                MATCH (p:Protein {protein_names: $protein_name})
-                OPTIONAL MATCH (p)-[:SIMILARITY]-(neighbor)
-                OPTIONAL MATCH (neighbor)-[r:SIMILARITY]-(second_neighbor)
-                RETURN p, 
-                    COLLECT(DISTINCT neighbor) AS direct_neighbors, 
-                    COLLECT(DISTINCT second_neighbor) AS second_neighbors,
-                    COLLECT(DISTINCT r) AS second_edges
+            result = session.run(
                 """
-                params = {"protein_name": protein_name}
-                result = session.run(query, **params)
-                record = result.single()
-                if record and record["p"]:
-                    return self._process_protein_record(record)
-
-            # --- keywords ---
-            if protein_key:
-                query = """
-                MATCH (p:Protein)
-                WHERE p.protein_names CONTAINS $keyword
-                OPTIONAL MATCH (p)-[:SIMILARITY]-(neighbor)
-                OPTIONAL MATCH (neighbor)-[r:SIMILARITY]-(second_neighbor)
-                RETURN p, 
-                    COLLECT(DISTINCT neighbor) AS direct_neighbors, 
-                    COLLECT(DISTINCT second_neighbor) AS second_neighbors,
-                    COLLECT(DISTINCT r) AS second_edges
+                UNWIND $entries AS entry
+                MATCH (p:Protein {entry: entry})
+                RETURN p.entry AS entry, p.entry_name AS name
+                """,
+                entries=entries,
+            )
+            names = {record["entry"]: record["name"] for record in result}
+        positions = export.positions_of(entries)
+        proteins = {
+            entry: {"entry": entry, "name": names.get(entry), "position": positions.get(entry)}
+            for entry in entries
+        }
+        edges = [
+            {"source": export.entries[u], "target": export.entries[v], "weight": weight}
+            for u, v, weight in zip(sources.tolist(), targets.tolist(), weights.tolist())
+        ]
+        return proteins, edges
+
+    def get_graph_analytics(self):
+        return self._export().analytics()
+
+    def get_layout_positions(self, entries):
+        # Precomputed layout coordinates, computed once per graph version
+        return self._export().positions_of(entries)
+
+    def _graph_version(self):
+        # Stamp written by ProteinGraph after every upload
+        with self.driver.session() as session:
+            record = session.run(
+                "MATCH (m:GraphMeta {name: 'protein_graph'}) RETURN m.version AS version"
+            ).single()
+            return record["version"] if record else None
+
+    def has_complete_graph(self):
+        # The version only moves once an upload has fully completed, and stays
+        # on the previous graph while the next one is being written
+        return self._graph_version() is not None
+
+    def _cached(self, name, params, compute):
+        QUERY_CACHE.sync_version(self._graph_version)
+        key = (self.uri, name, params)
+        hit, value = QUERY_CACHE.get(key)
+        if hit:
+            return value
+        value = compute()
+        QUERY_CACHE.put(key, value)
+        return value
+
+    def cache_stats(self):
+        return QUERY_CACHE.stats()
+
+    def search_protein(self, entry_id=None, protein_name=None, protein_key=None,
+                       first_k=25, second_k=10, min_weight=0.0):
+        return self._cached(
+            "search_protein", (entry_id, protein_name, protein_key, first_k, second_k, min_weight),
+            lambda: self._search_protein(entry_id, protein_name, protein_key, first_k, second_k, min_weight),
+        )
+
+    def _search_protein(self, entry_id=None, protein_name=None, protein_key=None,
+                        first_k=25, second_k=10, min_weight=0.0):
+        # ---  Entry ID ---
+        if entry_id:
+            data = self.expand_neighborhood(
+                "MATCH (p:Protein {entry: $entry})", {"entry": entry_id},
+                first_k=first_k, second_k=second_k, min_weight=min_weight,
+            )
+            if data:
+                return data
+
+        # --- Full Name ---
+        if protein_name:
+            data = self.expand_neighborhood(
+                "MATCH (p:Protein {protein_names: $protein_name})", {"protein_name": protein_name},
+                first_k=first_k, second_k=second_k, min_weight=min_weight,
+            )
+            if data:
+                return data
+
+        # --- keywords (best full-text match) ---
+        if protein_key and _fulltext_query(protein_key):
+            data = self.expand_neighborhood(
+                "CALL db.index.fulltext.queryNodes('protein_search', $query) YIELD node AS p",
+                {"query": _fulltext_query(protein_key)},
+                first_k=first_k, second_k=second_k, min_weight=min_weight,
+            )
+            if data:
+                return data
+
+        return
+
+    def search_candidates(self, keyword, page=0, page_size=20):
+        # Ranked, paginated keyword matches from the full-text index
+        return self._cached(
+            "search_candidates", (keyword, page, page_size),
+            lambda: self._search_candidates(keyword, page, page_size),
+        )
+
+    def _search_candidates(self, keyword, page=0, page_size=20):
+        if not _fulltext_query(keyword):
+            return []
+        with self.driver.session() as session:
+            result = session.run(
                 """
-                params = {"keyword": protein_key}
-                result = session.run(query, **params)
-                record = result.single()
-                if record and record["p"]:
-                    return self._process_protein_record(record)
+                CALL db.index.fulltext.queryNodes('protein_search', $query) YIELD node, score
+                RETURN node.entry AS entry, node.entry_name AS name,
+                       node.protein_names AS protein_names, score
+                SKIP $skip LIMIT $limit
+                """,
+                query=_fulltext_query(keyword),
+                skip=page * page_size,
+                limit=page_size,
+            )
+            return result.data()
 
-            return
+    def expand_neighborhood(self, match, params, first_k=25, second_k=10, min_weight=0.0):
+        # Two-hop expansion from the first protein bound by `match`, keeping the
+        # first_k heaviest edges of the seed and second_k of each neighbor, and
+        # returning property projections instead of whole nodes
+        query = f"""
+        {match}
+        WITH p LIMIT 1
+        CALL {{
+            WITH p
+            OPTIONAL MATCH (p)-[r:SIMILARITY]-(n:Protein)
+            WHERE r.weight >= $min_weight
+            WITH n, r ORDER BY r.weight DESC LIMIT $first_k
+            RETURN collect(n) AS hop,
+                   collect(n {{.entry, .entry_name, weight: r.weight}}) AS direct_neighbors
+        }}
+        CALL {{
+            WITH p, hop
+            UNWIND hop AS n
+            CALL {{
+                WITH p, n
+                MATCH (n)-[r:SIMILARITY]-(m:Protein)
+                WHERE m <> p AND r.weight >= $min_weight
+                RETURN m, r ORDER BY r.weight DESC LIMIT $second_k
+            }}
+            RETURN collect(DISTINCT m {{.entry, .entry_name}}) AS second_neighbors,
+                   collect(DISTINCT {{source: startNode(r).entry, target: endNode(r).entry, weight: r.weight}})
+                       AS second_edges
+        }}
+        RETURN p {{.entry, .entry_name, .gene_names, .ec_number}} AS p,
+               direct_neighbors, second_neighbors, second_edges
+        """
+        with self.driver.session() as session:
+            record = session.run(
+                query, **params, first_k=first_k, second_k=second_k, min_weight=min_weight
+            ).single()
+            if record and record["p"]:
+                return self._process_protein_record(record)
 
     def get_neighbors_by_id(self, entry_id):
+        return self._cached("get_neighbors_by_id", (entry_id,), lambda: self._get_neighbors_by_id(entry_id))
+
+    def _get_neighbors_by_id(self, entry_id):
         with self.driver.session() as session:
             result = session.run(
                 """
@@ -134,6 +264,90 @@ class ProteinGraphQuery:
                 "edges": edge_list,
             }
 
+    def expand_protein(self, entry_id, known_entries=(), limit=25):
+        # Neighbors of entry_id that are not in known_entries yet (the `limit`
+        # heaviest), with the edges to them and to the known ones, so a view can
+        # grow without reloading what it already shows. The full neighbor list
+        # is cached per entry; only the filtering depends on the view
+        data = self._ranked_neighbors(entry_id)
+        if data is None:
+            return None
+        known = set(known_entries)
+        fresh = [(neighbor, edge) for neighbor, edge in data["neighbors"] if neighbor["entry"] not in known][:limit]
+        seen = [edge for neighbor, edge in data["neighbors"] if neighbor["entry"] in known]
+        return {
+            "protein": dict(data["protein"]),
+            "neighbors": [dict(neighbor) for neighbor, _ in fresh],
+            "edges": [dict(edge) for _, edge in fresh] + [dict(edge) for edge in seen],
+        }
+
+    def _ranked_neighbors(self, entry_id):
+        return self._cached("ranked_neighbors", (entry_id,), lambda: self._fetch_ranked_neighbors(entry_id))
+
+    def _fetch_ranked_neighbors(self, entry_id):
+        # Every neighbor of entry_id with its edge, heaviest first
+        with self.driver.session() as session:
+            record = session.run(
+                """
+                MATCH (p:Protein {entry: $entry})
+                OPTIONAL MATCH (p)-[r:SIMILARITY]-(n:Protein)
+                WITH p, r, n ORDER BY r.weight DESC
+                RETURN p {.entry, .entry_name} AS p,
+                       collect(CASE WHEN n IS NOT NULL THEN
+                           {entry: n.entry, name: n.entry_name, source: startNode(r).entry,
+                            target: endNode(r).entry, weight: r.weight} END) AS neighbors
+                """,
+                entry=entry_id,
+            ).single()
+            if not record:
+                return None
+            return {
+                "protein": {"entry": record["p"]["entry"], "name": record["p"]["entry_name"]},
+                "neighbors": [
+                    ({"entry": n["entry"], "name": n["name"]},
+                     {"source": n["source"], "target": n["target"], "weight": n["weight"]})
+                    for n in record["neighbors"]
+                ],
+            }
+
+    def get_graph_statistics(self, isolated_limit=10):
+        # Materialized summary when it matches the current graph version,
+        # otherwise one live pass over the proteins
+        with self.driver.session() as session:
+            record = session.run(
+                """
+                OPTIONAL MATCH (m:GraphMeta {name: 'protein_graph'})
+                OPTIONAL MATCH (s:GraphStats {name: 'protein_graph'})
+                RETURN m.version AS version, s
+                """
+            ).single()
+            summary = record["s"] if record else None
+            if summary is not None and summary.get("version") == record["version"] \
+                    and len(summary["isolated_entries"]) >= min(isolated_limit, summary["isolated"]):
+                stats = from_properties(summary)
+                stats["isolated_list"] = stats["isolated_list"][:isolated_limit]
+                return stats
+
+            record = session.run(
+                """
+                MATCH (p:Protein)
+                WITH p, NOT EXISTS { (p)--() } AS isolated
+                RETURN count(p) AS total,
+                       count(p.ec_number) AS labelled,
+                       sum(CASE WHEN isolated THEN 1 ELSE 0 END) AS isolated,
+                       collect(CASE WHEN isolated THEN {Entry: p.entry, Name: p.protein_names} END)[..$limit]
+                           AS isolated_list
+                """,
+                limit=isolated_limit,
+            ).single()
+            return {
+                "total": record["total"],
+                "labelled": record["labelled"],
+                "unlabelled": record["total"] - record["labelled"],
+                "isolated": record["isolated"],
+                "isolated_list": record["isolated_list"],
+            }
+
     def get_total_proteins(self):
         with self.driver.session() as session:
             result = session.run("MATCH (p:Protein) RETURN COUNT(p) AS TotalProteins")
@@ -176,7 +390,7 @@ class ProteinGraphQuery:
         query = """
         MATCH (p:Protein {entry: $entry})
         RETURN p.entry AS entry, p.entry_name AS name, p.protein_names AS description, p.ec_number AS ec_number,
-            p.ec_predictions AS predictions
+            p.ec_predictions AS predictions, p.ec_prediction_weights AS prediction_weights
         """
         result = tx.run(query, entry=entry_id)
         return result.single()
@@ -205,23 +419,35 @@ class ProteinGraphQuery:
         top_ecs = sorted_ecs[:top_n]
         return top_ecs
 
+    def protein_info(self, entry_id):
+        with self.driver.session() as session:
+            record = session.execute_read(ProteinGraphQuery.get_protein_info, entry_id)
+            return record.data() if record else None
+
+    def predict_ec(self, entry_id, similarity_threshold=0.2, top_n=5, min_weight=0.0):
+        with self.driver.session() as session:
+            return session.execute_read(
+                ProteinGraphQuery.annotate_protein_multilabel, entry_id,
+                similarity_threshold=similarity_threshold, top_n=top_n, min_weight=min_weight,
+            )
+
+    def annotate_unlabelled(self, similarity_threshold=0.2, top_n=10, min_weight=0.1, batch_size=5000):
+        # Precompute ec_predictions for every unlabelled protein in one pass
+        arrays = graph_arrays_from_neo4j(self.driver, threshold=similarity_threshold)
+        predictions = predict_unlabelled(*arrays, similarity_threshold=similarity_threshold,
+                                         top_n=top_n, min_weight=min_weight)
+        return write_predictions(self.driver, predictions, batch_size=batch_size)
+
+    def propagate_labels(self, similarity_threshold=0.2, top_n=10, batch_size=5000, **options):
+        # Multi-hop alternative to annotate_unlabelled on a snapshot pulled from Neo4j
+        arrays = graph_arrays_from_neo4j(self.driver, threshold=similarity_threshold)
+        predictions, model = propagate_unlabelled(*arrays, similarity_threshold=similarity_threshold,
+                                                  top_n=top_n, **options)
+        write_predictions(self.driver, predictions, batch_size=batch_size)
+        return model.iterations
+
     def _process_protein_record(self, record):
         protein = record["p"]
-        direct_neighbors = record["direct_neighbors"]
-        second_neighbors = record["second_neighbors"]
-        second_edges = record["second_edges"]
-
-        # Prepare edges
-        edges_list = []
-        for rel in second_edges:
-            if rel:
-                edges_list.append(
-                    {
-                        "source": rel.start_node["entry"],
-                        "target": rel.end_node["entry"],
-                        "weight": rel["weight"],
-                    }
-                )
 
         return {
             "protein": {
@@ -231,14 +457,12 @@ class ProteinGraphQuery:
                 "function": protein["ec_number"],
             },
             "direct_neighbors": [
-                {"entry": n["entry"], "name": n["entry_name"]}
-                for n in direct_neighbors
-                if n
+                {"entry": n["entry"], "name": n["entry_name"], "weight": n["weight"]}
+                for n in record["direct_neighbors"]
             ],
             "second_neighbors": [
                 {"entry": n["entry"], "name": n["entry_name"]}
-                for n in second_neighbors
-                if n
+                for n in record["second_neighbors"]
             ],
-            "second_edges": edges_list,
+            "second_edges": [dict(edge) for edge in record["second_edges"]],
         }
@@ -0,0 +1,46 @@
+import numpy as np
+
+# Page statistics computed in one pass over the compact graph at ingestion
+# time; ProteinGraph stores them on a (:GraphStats) node stamped with the graph
+# version they describe.
+
+
+def compute_statistics(compact, isolated_limit=10):
+    ec_numbers = compact.attributes['ec_number']
+    labelled = sum(ec is not None for ec in ec_numbers)
+    isolated = np.flatnonzero(compact.degree() == 0)
+    sample = isolated[:isolated_limit].tolist()
+    return {
+        'total': compact.number_of_nodes(),
+        'labelled': labelled,
+        'unlabelled': compact.number_of_nodes() - labelled,
+        'isolated': len(isolated),
+        'isolated_list': [
+            {'Entry': compact.entries[i], 'Name': compact.attributes['protein_names'][i]} for i in sample
+        ],
+    }
+
+
+def to_properties(stats):
+    # Neo4j properties cannot hold maps, so the isolated sample is split into two lists
+    return {
+        'total': stats['total'],
+        'labelled': stats['labelled'],
+        'unlabelled': stats['unlabelled'],
+        'isolated': stats['isolated'],
+        'isolated_entries': [row['Entry'] for row in stats['isolated_list']],
+        'isolated_names': [row['Name'] or '' for row in stats['isolated_list']],
+    }
+
+
+def from_properties(properties):
+    return {
+        'total': properties['total'],
+        'labelled': properties['labelled'],
+        'unlabelled': properties['unlabelled'],
+        'isolated': properties['isolated'],
+        'isolated_list': [
+            {'Entry': entry, 'Name': name or None}
+            for entry, name in zip(properties['isolated_entries'], properties['isolated_names'])
+        ],
+    }
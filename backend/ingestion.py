@@ -0,0 +1,146 @@
+import threading
+import time
+from backend.data_loader import ProteinGraph
+from backend.domain_index import DomainIndex
+from backend.graph_query import ProteinGraphQuery
+from backend.memory_query import InMemoryGraphQuery
+from backend.query_backend import register_domain_index, register_query, use_memory_backend
+from backend.snapshot import snapshot_key
+
+# Load -> build -> upload pipeline run in a background thread. The job exposes
+# a status object the UI can poll and stops at the next progress report once
+# cancelled. Read pages keep using the previously registered graph until the
+# new one is swapped in at the end; with Neo4j they wait for the first
+# completed upload and then follow the graph version.
+
+STAGES = ['snapshot', 'parsing', 'scoring', 'indexing', 'uploading', 'annotating', 'warming']
+
+
+class IngestionCancelled(Exception):
+    pass
+
+
+class IngestionStatus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = 'pending'
+        self.stage = None
+        self.counters = {'rows_parsed': 0, 'pairs_scored': 0, 'similar_pairs': 0, 'edges_uploaded': 0, 'edges_total': 0}
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def count(self, counter, value):
+        with self._lock:
+            self.counters[counter] = value
+
+    def snapshot(self):
+        # Consistent copy for the UI
+        with self._lock:
+            return {
+                'state': self.state,
+                'stage': self.stage,
+                'counters': dict(self.counters),
+                'error': self.error,
+                'elapsed': ((self.finished or time.monotonic()) - self.started) if self.started else 0.0,
+            }
+
+
+class IngestionJob:
+    def __init__(self, data_path, sample_size=1000, similarity_threshold=0.3,
+                 snapshot_dir='backend/data/snapshots', index_dir='backend/data/domain_index',
+                 cache_path='backend/data/proteins.arrow'):
+        self.data_path = data_path
+        self.sample_size = sample_size
+        self.similarity_threshold = similarity_threshold
+        self.snapshot_dir = snapshot_dir
+        self.index_dir = index_dir
+        self.cache_path = cache_path
+        self.status = IngestionStatus()
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='protein-graph-ingestion', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise IngestionCancelled()
+
+    def _progress(self, counter, value):
+        # Every progress report is also a cancellation point
+        self._check_cancelled()
+        self.status.count(counter, value)
+
+    def _stage(self, stage):
+        self._check_cancelled()
+        self.status.update(stage=stage)
+
+    def _run(self):
+        self.status.update(state='running', started=time.monotonic())
+        try:
+            self.run()
+        except IngestionCancelled:
+            self.status.update(state='cancelled', finished=time.monotonic())
+        except Exception as error:
+            self.status.update(state='failed', error=f"{type(error).__name__}: {error}", finished=time.monotonic())
+        else:
+            self.status.update(state='done', stage=None, finished=time.monotonic())
+
+    def run(self):
+        self._stage('snapshot')
+        fingerprint = snapshot_key(self.data_path, sample_size=self.sample_size,
+                                   similarity_threshold=self.similarity_threshold)
+        pg = ProteinGraph()
+        snapshot_path = f'{self.snapshot_dir}/{fingerprint}.npz'
+        if not pg.load_snapshot(snapshot_path):
+            self._stage('parsing')
+            pg.load_data(self.data_path, sample_size=self.sample_size, cache_path=self.cache_path,
+                         progress=self._progress)
+            self._stage('scoring')
+            pg.build_graph(similarity_threshold=self.similarity_threshold, progress=self._progress)
+            pg.save_snapshot(snapshot_path)
+
+        self._stage('indexing')
+        index_path = f'{self.index_dir}/{fingerprint}'
+        index = DomainIndex.load(index_path) or pg.save_domain_index(index_path)
+
+        if use_memory_backend():
+            # Prepared off to the side, then swapped in as a whole
+            self._stage('annotating')
+            query = InMemoryGraphQuery(pg)
+            query.annotate_unlabelled()
+            self._stage('warming')
+            query.get_graph_analytics()
+            query.get_layout_positions([])
+            register_domain_index(index)
+            register_query(query)
+            return
+
+        self._stage('uploading')
+        pg.connect_neo4j()
+        query = ProteinGraphQuery()
+        uploaded = pg.sync_to_neo4j(fingerprint, progress=self._progress)
+        register_domain_index(index)
+        if uploaded:
+            # Fresh upload: precompute EC predictions for the unlabelled proteins
+            self._stage('annotating')
+            query.annotate_unlabelled()
+        # Warm the per-version analytics and layout so the pages open instantly
+        self._stage('warming')
+        query.get_graph_analytics()
+        query.get_layout_positions([])
@@ -0,0 +1,99 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scipy import sparse
+from backend.annotation import ec_label_matrix, similarity_matrix, split_ec
+
+# Label spreading over the SIMILARITY weights: F <- alpha * S F + (1 - alpha) Y
+# with S = D^-1/2 W D^-1/2. EC columns are propagated in blocks to bound the
+# dense score matrix, and each S @ F product is split by rows across threads
+# (scipy releases the GIL inside its sparse kernels).
+
+
+class LabelPropagation:
+    def __init__(self, alpha=0.9, tol=1e-4, max_iter=50, n_jobs=None, label_block_size=256):
+        self.alpha = alpha
+        self.tol = tol
+        self.max_iter = max_iter
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.label_block_size = label_block_size
+        self.iterations = []
+
+    @staticmethod
+    def normalize(adjacency):
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        inv_sqrt = np.zeros_like(degree)
+        inv_sqrt[degree > 0] = degree[degree > 0] ** -0.5
+        scale = sparse.diags(inv_sqrt)
+        return (scale @ adjacency @ scale).tocsr().astype(np.float32)
+
+    def propagate(self, adjacency, labels_matrix, rows, top_n=5):
+        # Top-n (scores, label columns) for the requested rows, heaviest first
+        transition = self.normalize(adjacency)
+        n, num_labels = labels_matrix.shape
+        step = max(1, -(-n // (self.n_jobs * 4)))
+        row_blocks = [(start, min(start + step, n)) for start in range(0, n, step)]
+        slices = [transition[start:stop] for start, stop in row_blocks]
+        labels_matrix = labels_matrix.tocsc()
+        best_scores = np.zeros((len(rows), 0), dtype=np.float32)
+        best_labels = np.zeros((len(rows), 0), dtype=np.int64)
+        self.iterations = []
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            def spread(scores):
+                out = np.empty_like(scores)
+
+                def work(block):
+                    (start, stop), matrix = block
+                    out[start:stop] = matrix @ scores
+
+                list(pool.map(work, zip(row_blocks, slices)))
+                return out
+
+            for label_start in range(0, num_labels, self.label_block_size):
+                label_stop = min(label_start + self.label_block_size, num_labels)
+                seeds = labels_matrix[:, label_start:label_stop].toarray().astype(np.float32)
+                scores = seeds.copy()
+                for iteration in range(self.max_iter):
+                    started = time.perf_counter()
+                    updated = self.alpha * spread(scores) + (1 - self.alpha) * seeds
+                    delta = float(np.abs(updated - scores).max()) if n else 0.0
+                    scores = updated
+                    self.iterations.append({
+                        'labels': (label_start, label_stop),
+                        'iteration': iteration,
+                        'seconds': time.perf_counter() - started,
+                        'delta': delta,
+                    })
+                    if delta < self.tol:
+                        break
+                block = scores[rows]
+                k = min(top_n, block.shape[1])
+                top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                best_scores = np.hstack([best_scores, np.take_along_axis(block, top, axis=1)])
+                best_labels = np.hstack([best_labels, top + label_start])
+                if best_scores.shape[1] > top_n:
+                    keep = np.argpartition(-best_scores, top_n - 1, axis=1)[:, :top_n]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_labels = np.take_along_axis(best_labels, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_labels, order, axis=1)
+
+
+def propagate_unlabelled(entries, ec_numbers, sources, targets, weights,
+                         similarity_threshold=0.2, top_n=5, min_score=1e-6, **options):
+    # Same output shape as annotation.predict_unlabelled, plus the fitted model
+    adjacency = similarity_matrix(len(entries), sources, targets, weights, similarity_threshold)
+    labels_matrix, labels = ec_label_matrix(ec_numbers)
+    unlabelled = np.array([i for i, ec in enumerate(ec_numbers) if not split_ec(ec)], dtype=np.int64)
+    model = LabelPropagation(**options)
+    if not labels:
+        return {entries[i]: [] for i in unlabelled.tolist()}, model
+    scores, columns = model.propagate(adjacency, labels_matrix, unlabelled, top_n=top_n)
+    predictions = {
+        entries[i]: [(labels[c], float(s)) for s, c in zip(row_scores.tolist(), row_columns.tolist()) if s >= min_score]
+        for i, row_scores, row_columns in zip(unlabelled.tolist(), scores, columns)
+    }
+    return predictions, model
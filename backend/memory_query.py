@@ -0,0 +1,212 @@
+import threading
+import numpy as np
+from backend.annotation import graph_arrays_from_compact, predict_unlabelled, split_ec
+from backend.graph_analytics import GraphExport
+from backend.graph_stats import compute_statistics
+from backend.label_propagation import propagate_unlabelled
+from backend.search_index import NGramIndex
+
+# ProteinGraphQuery served from an in-memory ProteinGraph: CSR adjacency from
+# the compact graph plus entry, name and n-gram indexes. Every method returns
+# the same shapes as the Neo4j-backed class.
+
+
+class InMemoryGraphQuery:
+    def __init__(self, protein_graph):
+        self.compact = protein_graph.compact
+        compact = self.compact
+        self.names = compact.attributes['entry_name']
+        self.name_index = {}
+        for i, protein_names in enumerate(compact.attributes['protein_names']):
+            self.name_index.setdefault(protein_names, i)
+        self.search_index = NGramIndex.from_compact(compact)
+        self.export = GraphExport.from_compact(compact)
+        self.predictions = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        pass
+
+    def cache_stats(self):
+        return {}
+
+    def _neighbors(self, i, k=None, min_weight=0.0, exclude=None):
+        # (position, weight) pairs heaviest first
+        indices, weights = self.compact.neighbors(i)
+        keep = weights >= min_weight
+        if exclude is not None:
+            keep &= indices != exclude
+        indices, weights = indices[keep], weights[keep]
+        order = np.argsort(-weights, kind='stable')[:k]
+        return list(zip(indices[order].tolist(), weights[order].tolist()))
+
+    def _edge(self, u, v, weight):
+        # Neo4j stores each edge from the earlier-uploaded protein
+        u, v = min(u, v), max(u, v)
+        return {"source": self.compact.entries[u], "target": self.compact.entries[v], "weight": weight}
+
+    def get_full_graph(self, limit=100):
+        proteins = {}
+        edges = []
+        rows = 0
+        entries = self.compact.entries
+        for i, entry in enumerate(entries):
+            if rows >= limit:
+                break
+            proteins[entry] = {"entry": entry, "name": self.names[i]}
+            neighbors = self._neighbors(i)
+            if not neighbors:
+                rows += 1
+            for j, weight in neighbors[:limit - rows]:
+                proteins[entries[j]] = {"entry": entries[j], "name": self.names[j]}
+                edges.append({"source": entry, "target": entries[j], "weight": weight})
+                rows += 1
+        return proteins, edges
+
+    def get_graph_sample(self, budget=100, strategy="top-degree", offset=0, seed=0):
+        page, sources, targets, weights = self.export.sample(budget, strategy, offset, seed)
+        entries = self.compact.entries
+        positions = self.export.positions_of([entries[i] for i in page.tolist()])
+        proteins = {
+            entries[i]: {"entry": entries[i], "name": self.names[i], "position": positions[entries[i]]}
+            for i in page.tolist()
+        }
+        edges = [
+            {"source": entries[u], "target": entries[v], "weight": weight}
+            for u, v, weight in zip(sources.tolist(), targets.tolist(), weights.tolist())
+        ]
+        return proteins, edges
+
+    def search_protein(self, entry_id=None, protein_name=None, protein_key=None,
+                       first_k=25, second_k=10, min_weight=0.0):
+        seed = None
+        if entry_id and entry_id in self.compact.index:
+            seed = self.compact.index[entry_id]
+        elif protein_name and protein_name in self.name_index:
+            seed = self.name_index[protein_name]
+        elif protein_key:
+            matches = self.search_index.search(protein_key, page_size=1)
+            if matches:
+                seed = self.compact.index[matches[0]["entry"]]
+        if seed is None:
+            return
+        return self.expand_neighborhood(seed, first_k=first_k, second_k=second_k, min_weight=min_weight)
+
+    def search_candidates(self, keyword, page=0, page_size=20):
+        return self.search_index.search(keyword, page=page, page_size=page_size)
+
+    def expand_neighborhood(self, seed, first_k=25, second_k=10, min_weight=0.0):
+        compact, entries = self.compact, self.compact.entries
+        direct = self._neighbors(seed, first_k, min_weight)
+        second_neighbors, second_edges = {}, {}
+        for j, _ in direct:
+            for m, weight in self._neighbors(j, second_k, min_weight, exclude=seed):
+                second_neighbors.setdefault(m, {"entry": entries[m], "name": self.names[m]})
+                second_edges.setdefault((min(j, m), max(j, m)), self._edge(j, m, weight))
+        return {
+            "protein": {
+                "entry": entries[seed],
+                "name": self.names[seed],
+                "gene_names": compact.attributes['gene_names'][seed],
+                "function": compact.attributes['ec_number'][seed],
+            },
+            "direct_neighbors": [
+                {"entry": entries[j], "name": self.names[j], "weight": weight} for j, weight in direct
+            ],
+            "second_neighbors": list(second_neighbors.values()),
+            "second_edges": list(second_edges.values()),
+        }
+
+    def get_neighbors_by_id(self, entry_id):
+        i = self.compact.index.get(entry_id)
+        if i is None:
+            return None
+        neighbors = self._neighbors(i)
+        entries = self.compact.entries
+        return {
+            "protein": {"entry": entry_id, "name": self.names[i]},
+            "neighbors": [{"entry": entries[j], "name": self.names[j]} for j, _ in neighbors],
+            "edges": [self._edge(i, j, weight) for j, weight in neighbors],
+        }
+
+    def expand_protein(self, entry_id, known_entries=(), limit=25):
+        i = self.compact.index.get(entry_id)
+        if i is None:
+            return None
+        entries = self.compact.entries
+        known = set(known_entries)
+        neighbors = self._neighbors(i)
+        fresh = [(j, weight) for j, weight in neighbors if entries[j] not in known][:limit]
+        seen = [(j, weight) for j, weight in neighbors if entries[j] in known]
+        return {
+            "protein": {"entry": entry_id, "name": self.names[i]},
+            "neighbors": [{"entry": entries[j], "name": self.names[j]} for j, _ in fresh],
+            "edges": [self._edge(i, j, weight) for j, weight in fresh + seen],
+        }
+
+    def get_graph_statistics(self, isolated_limit=10):
+        return compute_statistics(self.compact, isolated_limit=isolated_limit)
+
+    def get_graph_analytics(self):
+        return self.export.analytics()
+
+    def get_layout_positions(self, entries):
+        return self.export.positions_of(entries)
+
+    def get_total_proteins(self):
+        return self.compact.number_of_nodes()
+
+    def get_labelled_unlabelled(self):
+        labelled = sum(ec is not None for ec in self.compact.attributes['ec_number'])
+        return labelled, self.compact.number_of_nodes() - labelled
+
+    def get_isolated_proteins_count(self):
+        return int((self.compact.degree() == 0).sum())
+
+    def get_isolated_proteins_list(self, limit=10):
+        isolated = np.flatnonzero(self.compact.degree() == 0)[:limit].tolist()
+        return [
+            {"Entry": self.compact.entries[i], "Name": self.compact.attributes['protein_names'][i]}
+            for i in isolated
+        ]
+
+    def protein_info(self, entry_id):
+        i = self.compact.index.get(entry_id)
+        if i is None:
+            return None
+        predictions = self.predictions.get(entry_id)
+        return {
+            "entry": entry_id,
+            "name": self.names[i],
+            "description": self.compact.attributes['protein_names'][i],
+            "ec_number": self.compact.attributes['ec_number'][i],
+            "predictions": [ec for ec, _ in predictions] if predictions else None,
+            "prediction_weights": [weight for _, weight in predictions] if predictions else None,
+        }
+
+    def predict_ec(self, entry_id, similarity_threshold=0.2, top_n=5, min_weight=0.0):
+        i = self.compact.index.get(entry_id)
+        if i is None:
+            return []
+        ec_weights = {}
+        for j, weight in self._neighbors(i, min_weight=similarity_threshold):
+            for ec in split_ec(self.compact.attributes['ec_number'][j]):
+                ec_weights[ec] = ec_weights.get(ec, 0.0) + weight
+        filtered_ecs = [(ec, weight) for ec, weight in ec_weights.items() if weight >= min_weight]
+        return sorted(filtered_ecs, key=lambda x: x[1], reverse=True)[:top_n]
+
+    def annotate_unlabelled(self, similarity_threshold=0.2, top_n=10, min_weight=0.1, batch_size=5000):
+        predictions = predict_unlabelled(*graph_arrays_from_compact(self.compact),
+                                         similarity_threshold=similarity_threshold,
+                                         top_n=top_n, min_weight=min_weight)
+        with self._lock:
+            self.predictions.update(predictions)
+        return len(predictions)
+
+    def propagate_labels(self, similarity_threshold=0.2, top_n=10, batch_size=5000, **options):
+        predictions, model = propagate_unlabelled(*graph_arrays_from_compact(self.compact),
+                                                  similarity_threshold=similarity_threshold,
+                                                  top_n=top_n, **options)
+        with self._lock:
+            self.predictions.update(predictions)
+        return model.iterations
@@ -1,11 +1,65 @@
+import atexit
+import threading
 from neo4j import GraphDatabase
 
+# Process-wide driver registry: one pooled driver per (uri, user) shared by
+# ProteinGraphQuery, Neo4jConnection and ProteinGraph, created on first use.
+
+POOL_CONFIG = {
+    'max_connection_pool_size': 50,
+    'max_connection_lifetime': 3600,
+    'connection_acquisition_timeout': 60,
+}
+
+_drivers = {}
+_lock = threading.Lock()
+_stats = {'drivers_created': 0, 'driver_requests': 0}
+
+
+def configure_pool(**config):
+    # Applies to drivers created after the call
+    with _lock:
+        POOL_CONFIG.update(config)
+
+
+def get_driver(uri="bolt://localhost:7687", user="neo4j", password="12345678"):
+    key = (uri, user, password)
+    with _lock:
+        _stats['driver_requests'] += 1
+        driver = _drivers.get(key)
+        if driver is None:
+            driver = GraphDatabase.driver(uri, auth=(user, password), **POOL_CONFIG)
+            _drivers[key] = driver
+            _stats['drivers_created'] += 1
+        return driver
+
+
+def pool_stats():
+    with _lock:
+        return {
+            'drivers': len(_drivers),
+            'drivers_created': _stats['drivers_created'],
+            'driver_requests': _stats['driver_requests'],
+            'reused': _stats['driver_requests'] - _stats['drivers_created'],
+            **POOL_CONFIG,
+        }
+
+
+@atexit.register
+def close_all():
+    with _lock:
+        for driver in _drivers.values():
+            driver.close()
+        _drivers.clear()
+
+
 class Neo4jConnection:
     def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver = get_driver(uri, user, password)
 
     def close(self):
-        self.driver.close()
+        # The pooled driver is shared and stays open for other callers
+        pass
 
     def query(self, query, parameters=None):
         with self.driver.session() as session:
@@ -0,0 +1,48 @@
+import os
+import pyarrow as pa
+
+# Cleaned protein tables are cached as uncompressed Arrow IPC files, which can
+# be memory-mapped and read without copying. InterPro_list is stored as a
+# list<string> column, so no string splitting is needed on load.
+
+
+def _source_metadata(file_path):
+    stat = os.stat(file_path)
+    return {
+        'source': os.path.abspath(file_path),
+        'source_size': str(stat.st_size),
+        'source_mtime': str(stat.st_mtime_ns),
+    }
+
+
+def save_protein_table(data, cache_path, file_path, complete):
+    schema = pa.schema([
+        (col, pa.list_(pa.string()) if col == 'InterPro_list' else pa.string())
+        for col in data.columns
+    ])
+    table = pa.Table.from_pandas(data, schema=schema, preserve_index=False)
+    metadata = dict(_source_metadata(file_path), rows=str(len(data)), complete='1' if complete else '0')
+    table = table.replace_schema_metadata(metadata)
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, cache_path)
+
+
+def load_protein_table(cache_path, file_path, sample_size=None):
+    # Returns None when the cache is missing, stale or holds too few rows
+    if not os.path.exists(cache_path):
+        return None
+    table = pa.ipc.open_file(pa.memory_map(cache_path, 'r')).read_all()
+    metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    if any(metadata.get(k) != v for k, v in _source_metadata(file_path).items()):
+        return None
+    if metadata.get('complete') != '1' and (sample_size is None or int(metadata['rows']) < sample_size):
+        return None
+    if sample_size is not None:
+        table = table.slice(0, sample_size)
+    data = table.to_pandas()
+    strings = data.columns.drop('InterPro_list')
+    data[strings] = data[strings].astype(object).where(data[strings].notna(), None)
+    return data
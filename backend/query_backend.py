@@ -0,0 +1,61 @@
+import os
+import threading
+from backend.graph_query import ProteinGraphQuery
+from backend.memory_query import InMemoryGraphQuery
+
+# Read pages ask this module for their query object. PROTEIN_GRAPH_BACKEND
+# selects "neo4j" (default) or "memory", which serves the ProteinGraph
+# registered by the ingestion code without any database round trip.
+
+BACKEND = os.environ.get("PROTEIN_GRAPH_BACKEND", "neo4j")
+
+_memory_query = None
+_domain_index = None
+_lock = threading.Lock()
+
+
+def use_memory_backend():
+    return BACKEND == "memory"
+
+
+def register_graph(protein_graph):
+    return register_query(InMemoryGraphQuery(protein_graph))
+
+
+def register_query(query):
+    # Swaps the in-memory graph served to the pages in one step
+    global _memory_query
+    with _lock:
+        _memory_query = query
+    return query
+
+
+def is_ready():
+    # Whether the pages have a graph to read from
+    if use_memory_backend():
+        with _lock:
+            return _memory_query is not None
+    # Neo4j: not until a first upload has completed
+    return ProteinGraphQuery().has_complete_graph()
+
+
+def register_domain_index(index):
+    global _domain_index
+    with _lock:
+        _domain_index = index
+    return index
+
+
+def get_domain_index():
+    # DomainIndex of the current proteome, or None before ingestion saved one
+    with _lock:
+        return _domain_index
+
+
+def get_query_backend():
+    if use_memory_backend():
+        with _lock:
+            if _memory_query is None:
+                raise RuntimeError("No in-memory graph has been registered yet")
+            return _memory_query
+    return ProteinGraphQuery()
@@ -0,0 +1,87 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# Bounded LRU + TTL cache for read-only query results. Values are stored
+# pickled, which both caps memory exactly and hands every caller its own copy.
+
+
+class QueryCache:
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024, ttl=600, version_check_interval=5):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._version = None
+        self._version_checked = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    self._evict(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = item[1]
+        return True, pickle.loads(payload)
+
+    def put(self, key, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic() + self.ttl, payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def sync_version(self, read_version):
+        # Drops every entry when the graph version stamp changes; the stamp is
+        # re-read at most once per version_check_interval seconds
+        now = time.monotonic()
+        with self._lock:
+            if now - self._version_checked < self.version_check_interval:
+                return
+            self._version_checked = now
+        version = read_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'version': self._version,
+            }
+
+
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,75 @@
+import re
+from collections import defaultdict
+
+# In-process substitute for the Neo4j full-text index, used by the local
+# backend: character n-gram posting lists narrow the candidates, which are then
+# confirmed with a substring check and ranked.
+
+SEARCH_FIELDS = ['protein_names', 'gene_names', 'entry_name']
+
+
+class NGramIndex:
+    def __init__(self, n=3):
+        self.n = n
+        self.entries = []
+        self.names = []
+        self.protein_names = []
+        self.texts = []
+        self.postings = defaultdict(list)
+
+    @classmethod
+    def from_compact(cls, compact, n=3):
+        index = cls(n=n)
+        for i, entry in enumerate(compact.entries):
+            index.add(entry, compact.attributes['entry_name'][i],
+                      [compact.attributes[field][i] for field in SEARCH_FIELDS])
+        return index
+
+    def _grams(self, text):
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, entry, name, fields):
+        doc = len(self.entries)
+        text = ' | '.join(field.lower() for field in fields if field)
+        self.entries.append(entry)
+        self.names.append(name)
+        self.protein_names.append(fields[0])
+        self.texts.append(text)
+        for gram in self._grams(text):
+            self.postings[gram].append(doc)
+
+    def search(self, keyword, page=0, page_size=20):
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return []
+        grams = self._grams(keyword)
+        if grams:
+            # intersect the rarest posting lists first
+            lists = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+            candidates = set(lists[0])
+            for posting in lists[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    break
+        else:
+            candidates = range(len(self.entries))
+        matches = []
+        for doc in candidates:
+            text = self.texts[doc]
+            position = text.find(keyword)
+            if position < 0:
+                continue
+            # whole-word hits first, then earlier and shorter texts
+            whole_word = re.search(rf'\b{re.escape(keyword)}\b', text) is not None
+            score = (2.0 if whole_word else 1.0) / (1 + position / 100) * len(keyword) / len(text)
+            matches.append((-score, self.entries[doc], doc))
+        matches.sort()
+        return [
+            {
+                "entry": self.entries[doc],
+                "name": self.names[doc],
+                "protein_names": self.protein_names[doc],
+                "score": -score,
+            }
+            for score, _, doc in matches[page * page_size:(page + 1) * page_size]
+        ]
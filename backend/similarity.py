@@ -0,0 +1,368 @@
+import heapq
+import os
+import numpy as np
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from scipy import sparse
+from tqdm import tqdm
+
+
+def build_domain_index(domain_sets):
+    # InterPro domain -> ascending positions of the proteins that carry it
+    index = defaultdict(list)
+    for i, domains in enumerate(domain_sets):
+        for domain in domains:
+            index[domain].append(i)
+    return index
+
+
+def jaccard(domains_u, domains_v):
+    intersection = len(domains_u.intersection(domains_v))
+    union = len(domains_u.union(domains_v))
+    return intersection / union if union else 0
+
+
+def indexed_jaccard_edges(domain_sets, similarity_threshold=0.3, progress=None, every=1024):
+    # Only pairs sharing at least one domain can reach a positive score, so
+    # candidates come from the posting lists instead of all n^2 combinations.
+    # Pairs are yielded as (i, j, weight) with i < j in combinations() order.
+    # progress(counter, value), when given, receives the 'pairs_scored' total
+    n = len(domain_sets)
+    index = build_domain_index(domain_sets)
+    scored = 0
+    for i in tqdm(range(n), total=n):
+        domains_u = domain_sets[i]
+        if similarity_threshold <= 0:
+            candidates = range(i + 1, n)
+        else:
+            candidates = set()
+            for domain in domains_u:
+                posting = index[domain]
+                candidates.update(posting[bisect_right(posting, i):])
+            candidates = sorted(candidates)
+        scored += len(candidates)
+        if progress is not None and i % every == 0:
+            progress('pairs_scored', scored)
+        for j in candidates:
+            score = jaccard(domains_u, domain_sets[j])
+            if score >= similarity_threshold:
+                yield i, j, score
+    if progress is not None:
+        progress('pairs_scored', scored)
+
+
+def rescore_jaccard_edges(domain_sets, rows, similarity_threshold=0.3):
+    # Edges touching the given rows only, each pair scored once, for delta updates
+    n = len(domain_sets)
+    index = build_domain_index(domain_sets)
+    dirty = set(rows)
+    for i in sorted(dirty):
+        domains_u = domain_sets[i]
+        if similarity_threshold <= 0:
+            candidates = range(n)
+        else:
+            candidates = set()
+            for domain in domains_u:
+                candidates.update(index[domain])
+            candidates = sorted(candidates)
+        for j in candidates:
+            if j == i or (j in dirty and j < i):
+                continue
+            score = jaccard(domains_u, domain_sets[j])
+            if score >= similarity_threshold:
+                yield min(i, j), max(i, j), score
+
+
+def domain_matrix(domain_sets):
+    # Binary protein x domain CSR matrix; columns follow the sorted vocabulary
+    vocabulary = {domain: k for k, domain in enumerate(sorted(set().union(*domain_sets)))}
+    indptr = np.zeros(len(domain_sets) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(domains) for domains in domain_sets])
+    indices = np.fromiter(
+        (vocabulary[domain] for domains in domain_sets for domain in domains),
+        dtype=np.int32, count=int(indptr[-1]),
+    )
+    data = np.ones(len(indices), dtype=np.int32)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(domain_sets), len(vocabulary)))
+    matrix.sort_indices()
+    return matrix, vocabulary
+
+
+def sparse_jaccard_edges(domain_sets, similarity_threshold=0.3, block_size=2048, progress=None):
+    # Intersections come from X[block] @ X.T, unions from the row sums, so
+    # memory is bounded by block_size rows of the product at a time.
+    if similarity_threshold <= 0:
+        # Zero-overlap pairs never show up in the sparse product
+        yield from indexed_jaccard_edges(domain_sets, similarity_threshold, progress=progress)
+        return
+    n = len(domain_sets)
+    if n == 0:
+        return
+    matrix, _ = domain_matrix(domain_sets)
+    sizes = np.diff(matrix.indptr)
+    transposed = matrix.T.tocsr()
+    scored = 0
+    for start in tqdm(range(0, n, block_size), total=-(-n // block_size)):
+        stop = min(start + block_size, n)
+        block = (matrix[start:stop] @ transposed).tocoo()
+        rows = block.row.astype(np.int64) + start
+        cols = block.col.astype(np.int64)
+        upper = cols > rows
+        rows, cols, intersection = rows[upper], cols[upper], block.data[upper]
+        scored += len(rows)
+        if progress is not None:
+            progress('pairs_scored', scored)
+        scores = intersection / (sizes[rows] + sizes[cols] - intersection)
+        keep = scores >= similarity_threshold
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+        order = np.lexsort((cols, rows))
+        yield from zip(rows[order].tolist(), cols[order].tolist(), scores[order].tolist())
+
+
+MINHASH_PRIME = (1 << 31) - 1
+
+
+def minhash_signatures(matrix, num_perm, seed=0, block_size=4096):
+    # One min-hash per permutation h(x) = (a*x + b) mod p over domain column ids
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    n = matrix.shape[0]
+    signatures = np.full((n, num_perm), MINHASH_PRIME, dtype=np.uint64)
+    sizes = np.diff(matrix.indptr)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        lo, hi = matrix.indptr[start], matrix.indptr[stop]
+        if hi == lo:
+            continue
+        columns = matrix.indices[lo:hi].astype(np.uint64)
+        hashed = (columns[:, None] * a[None, :] + b[None, :]) % MINHASH_PRIME
+        offsets = matrix.indptr[start:stop] - lo
+        non_empty = sizes[start:stop] > 0
+        signatures[start:stop][non_empty] = np.minimum.reduceat(hashed, offsets[non_empty], axis=0)
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, num_bands, rows_per_band):
+    # Proteins whose signatures agree on a whole band land in the same bucket;
+    # pairs are returned as sorted, de-duplicated (i, j) arrays with i < j
+    n = signatures.shape[0]
+    keys = []
+    pair_offsets = {}
+    for band in range(num_bands):
+        band_keys = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        _, buckets, counts = np.unique(band_keys, axis=0, return_inverse=True, return_counts=True)
+        buckets = buckets.ravel()
+        shared = counts[buckets] > 1
+        members, buckets = np.flatnonzero(shared), buckets[shared]
+        order = np.argsort(buckets, kind='stable')
+        members, buckets = members[order], buckets[order]
+        boundaries = np.flatnonzero(np.diff(buckets)) + 1
+        for group in np.split(members, boundaries):
+            if len(group) > 1:
+                if len(group) not in pair_offsets:
+                    pair_offsets[len(group)] = np.triu_indices(len(group), k=1)
+                left, right = pair_offsets[len(group)]
+                keys.append(group[left].astype(np.int64) * n + group[right])
+    if not keys:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    keys = np.unique(np.concatenate(keys))
+    return keys // n, keys % n
+
+
+def lsh_collision_probability(similarity, num_bands, rows_per_band):
+    return 1 - (1 - similarity ** rows_per_band) ** num_bands
+
+
+def minhash_jaccard_edges(domain_sets, similarity_threshold=0.3, num_bands=32, rows_per_band=2, seed=0,
+                          progress=None):
+    # Approximate mode: exact Jaccard is only computed for LSH collisions
+    if not domain_sets:
+        return
+    matrix, _ = domain_matrix(domain_sets)
+    signatures = minhash_signatures(matrix, num_bands * rows_per_band, seed=seed)
+    rows, cols = lsh_candidate_pairs(signatures, num_bands, rows_per_band)
+    for i, j in tqdm(zip(rows.tolist(), cols.tolist()), total=len(rows)):
+        score = jaccard(domain_sets[i], domain_sets[j])
+        if score >= similarity_threshold:
+            yield i, j, score
+    if progress is not None:
+        progress('pairs_scored', len(rows))
+
+
+def estimate_recall(domain_sets, edges, similarity_threshold=0.3, sample_size=200, seed=0):
+    # Share of the exact edges of a random protein sample that were found
+    n = len(domain_sets)
+    if n == 0:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, size=min(sample_size, n), replace=False).tolist()
+    index = build_domain_index(domain_sets)
+    found = {(i, j) for i, j, _ in edges}
+    expected = hits = 0
+    for i in sample:
+        candidates = set()
+        for domain in domain_sets[i]:
+            candidates.update(index[domain])
+        candidates.discard(i)
+        for j in candidates:
+            if jaccard(domain_sets[i], domain_sets[j]) >= similarity_threshold:
+                expected += 1
+                hits += (min(i, j), max(i, j)) in found
+    return hits / expected if expected else 1.0
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def pair_hash(i, j, seed=0):
+    # Deterministic 64-bit mix of an unordered pair (splitmix64 finalizer)
+    i, j = min(i, j), max(i, j)
+    z = (i * 0x9E3779B97F4A7C15 + j + seed * 0xD1B54A32D192ED03) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class TopKSelector:
+    # Degree-bounded sparsification: streams (i, j, weight) edges from any
+    # engine and keeps each protein's k heaviest neighbors in a bounded
+    # min-heap, so memory is O(n * k) whatever the candidate volume.
+    # Equal scores (a family sharing one domain) are ranked by a seeded pair
+    # hash, so tied proteins spread their picks instead of all choosing the
+    # same lowest positions.
+    def __init__(self, n, k, mutual=False, max_degree=None, seed=0):
+        self.k = k
+        self.mutual = mutual
+        self.max_degree = 2 * k if max_degree is None else max_degree
+        self.seed = seed
+        self.heaps = [[] for _ in range(n)]
+        self.degree_before = np.zeros(n, dtype=np.int64)
+
+    def _offer(self, i, j, weight, rank):
+        heap = self.heaps[i]
+        item = (weight, rank, j)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def add(self, edges):
+        for i, j, weight in edges:
+            self.degree_before[i] += 1
+            self.degree_before[j] += 1
+            rank = pair_hash(i, j, self.seed)
+            self._offer(i, j, weight, rank)
+            self._offer(j, i, weight, rank)
+        return self
+
+    def edges(self):
+        # An edge is a candidate when it is in the top k of either endpoint, or
+        # of both with mutual=True; candidates are then accepted heaviest first
+        # while both endpoints are below max_degree, a hard cap in either mode
+        votes = defaultdict(int)
+        ranks = {}
+        for i, heap in enumerate(self.heaps):
+            for weight, rank, j in heap:
+                pair = (min(i, j), max(i, j))
+                votes[pair] += 1
+                ranks[pair] = (weight, rank)
+        needed = 2 if self.mutual else 1
+        candidates = sorted((pair for pair, count in votes.items() if count >= needed),
+                            key=lambda pair: ranks[pair], reverse=True)
+        degree = defaultdict(int)
+        kept = []
+        for i, j in candidates:
+            if degree[i] < self.max_degree and degree[j] < self.max_degree:
+                degree[i] += 1
+                degree[j] += 1
+                kept.append((i, j))
+        for i, j in sorted(kept):
+            yield i, j, ranks[(i, j)][0]
+
+
+# ---------------- Parallel build -----------------
+_shared = {}
+
+
+def _share(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach_shared(specs):
+    # Pool initializer: map the CSR arrays once per worker process
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        _shared[key] = (block, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+
+def _score_rows(start, stop, similarity_threshold):
+    indptr, indices = _shared['indptr'][1], _shared['indices'][1]
+    post_indptr, postings = _shared['post_indptr'][1], _shared['postings'][1]
+    sizes = np.diff(indptr)
+    rows, cols, scores, scored = [], [], [], 0
+    for i in range(start, stop):
+        domains = indices[indptr[i]:indptr[i + 1]]
+        candidates = np.concatenate([postings[post_indptr[d]:post_indptr[d + 1]] for d in domains])
+        candidates = candidates[candidates > i]
+        if not len(candidates):
+            continue
+        # every shared domain contributes one occurrence of the candidate
+        partners, intersection = np.unique(candidates, return_counts=True)
+        scored += len(partners)
+        score = intersection / (sizes[i] + sizes[partners] - intersection)
+        keep = score >= similarity_threshold
+        rows.append(np.full(keep.sum(), i, dtype=np.int32))
+        cols.append(partners[keep].astype(np.int32))
+        scores.append(score[keep])
+    if not rows:
+        return np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float64), scored
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores), scored
+
+
+def parallel_jaccard_edges(domain_sets, similarity_threshold=0.3, workers=None, chunk_size=256, progress=None):
+    # Row shards of the domain index are scored in worker processes that read
+    # the protein->domain and domain->protein CSR arrays from shared memory.
+    # Partial edge arrays are merged and sorted, so the result is deterministic.
+    if similarity_threshold <= 0:
+        yield from indexed_jaccard_edges(domain_sets, similarity_threshold, progress=progress)
+        return
+    n = len(domain_sets)
+    if n == 0:
+        return
+    workers = workers or os.cpu_count()
+    matrix, _ = domain_matrix(domain_sets)
+    inverted = matrix.T.tocsr()
+    arrays = {
+        'indptr': matrix.indptr.astype(np.int64),
+        'indices': matrix.indices.astype(np.int32),
+        'post_indptr': inverted.indptr.astype(np.int64),
+        'postings': inverted.indices.astype(np.int32),
+    }
+    blocks, specs = [], {}
+    try:
+        for key, array in arrays.items():
+            block, specs[key] = _share(array)
+            blocks.append(block)
+        shards = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared, initargs=(specs,)) as pool:
+            futures = [pool.submit(_score_rows, start, stop, similarity_threshold) for start, stop in shards]
+            parts, scored = [], 0
+            for future in tqdm(futures, total=len(futures)):
+                parts.append(future.result())
+                scored += parts[-1][3]
+                if progress is not None:
+                    progress('pairs_scored', scored)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    rows = np.concatenate([part[0] for part in parts])
+    cols = np.concatenate([part[1] for part in parts])
+    scores = np.concatenate([part[2] for part in parts])
+    order = np.lexsort((cols, rows))
+    yield from zip(rows[order].tolist(), cols[order].tolist(), scores[order].tolist())
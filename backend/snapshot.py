@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import numpy as np
+from backend.compact_graph import NODE_ATTRIBUTES, CompactGraph
+
+# Built graphs are saved as a single .npz of the CompactGraph arrays, with
+# strings packed as one UTF-8 buffer plus offsets.
+
+SNAPSHOT_FORMAT = 2
+
+
+def snapshot_key(file_path, **params):
+    # Content hash of the input file plus the build parameters
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(json.dumps(dict(params, format=SNAPSHOT_FORMAT), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _pack_strings(values):
+    encoded = [b'' if value is None else value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    nulls = np.array([value is None for value in values], dtype=bool)
+    return data, offsets, nulls
+
+
+def _unpack_strings(data, offsets, nulls):
+    buffer = data.tobytes()
+    return [
+        None if null else buffer[start:stop].decode()
+        for start, stop, null in zip(offsets[:-1].tolist(), offsets[1:].tolist(), nulls.tolist())
+    ]
+
+
+def save_graph_snapshot(compact, path):
+    arrays = {}
+    for name, values in [('entry', compact.entries), ('domain', compact.domain_vocabulary)] + \
+            [(attr, compact.attributes[attr]) for attr in NODE_ATTRIBUTES]:
+        arrays[f'{name}_data'], arrays[f'{name}_offsets'], arrays[f'{name}_nulls'] = _pack_strings(values)
+    arrays['domain_indptr'] = compact.domain_indptr
+    arrays['domain_indices'] = compact.domain_indices
+    arrays['indptr'] = compact.indptr
+    arrays['indices'] = compact.indices
+    arrays['weights'] = compact.weights
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_graph_snapshot(path):
+    with np.load(path) as arrays:
+        strings = {
+            name: _unpack_strings(arrays[f'{name}_data'], arrays[f'{name}_offsets'], arrays[f'{name}_nulls'])
+            for name in ['entry', 'domain'] + NODE_ATTRIBUTES
+        }
+        return CompactGraph(
+            strings['entry'],
+            {attr: strings[attr] for attr in NODE_ATTRIBUTES},
+            strings['domain'],
+            arrays['domain_indptr'], arrays['domain_indices'],
+            arrays['indptr'], arrays['indices'], arrays['weights'],
+        )
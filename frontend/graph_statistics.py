@@ -1,5 +1,5 @@
 import streamlit as st
-from backend.graph_query import ProteinGraphQuery
+from backend.query_backend import get_query_backend
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -7,13 +7,17 @@ import plotly.graph_objects as go
 def show():
     st.title("Graph statistics")
 
-    query = ProteinGraphQuery()
+    query = get_query_backend()
 
-    # General Stats
-    total = query.get_total_proteins()
-    labelled, unlabelled = query.get_labelled_unlabelled()
-    isolated = query.get_isolated_proteins_count()
-    isolated_list = query.get_isolated_proteins_list()
+    # General Stats, one round-trip
+    stats = query.get_graph_statistics()
+    total = stats['total']
+    labelled, unlabelled = stats['labelled'], stats['unlabelled']
+    isolated = stats['isolated']
+    isolated_list = stats['isolated_list']
+
+    # Structure analytics, computed once per graph version
+    analytics = query.get_graph_analytics()
     query.close()
 
     # General Info
@@ -42,3 +46,42 @@ def show():
         st.dataframe(df_iso)
     else:
         st.write("No isolated proteins found.")
+
+
+    # --- STRUCTURE ---
+    st.subheader("Graph structure:")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Similarity edges", analytics['edges'])
+    col2.metric("Mean degree", f"{analytics['mean_degree']:.2f}")
+    col3.metric("Connected components", analytics['components'])
+    col4.metric("Largest component", analytics['largest_component'])
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Communities", analytics['communities'])
+    col2.metric("Modularity", f"{analytics['modularity']:.3f}")
+    col3.metric("Avg. clustering (sampled)", f"{analytics['average_clustering']:.3f}")
+
+    # --- DEGREE DISTRIBUTION ---
+    degrees = analytics['degree_histogram']
+    fig = px.bar(x=degrees['degree'], y=degrees['count'],
+                 labels={'x': 'Degree', 'y': 'Proteins'},
+                 title='Degree distribution',
+                 color_discrete_sequence=['#2A629A'])
+    st.plotly_chart(fig)
+
+    # --- WEIGHT DISTRIBUTION ---
+    weights = analytics['weight_histogram']
+    bin_edges = weights['bin_edges']
+    fig = go.Figure(go.Bar(x=[(lo + hi) / 2 for lo, hi in zip(bin_edges, bin_edges[1:])],
+                           y=weights['count'],
+                           width=[hi - lo for lo, hi in zip(bin_edges, bin_edges[1:])],
+                           marker_color='#FF7F3E'))
+    fig.update_layout(title='Similarity weight distribution', xaxis_title='Jaccard weight', yaxis_title='Edges')
+    st.plotly_chart(fig)
+
+    # --- COMPONENTS AND COMMUNITIES ---
+    col1, col2 = st.columns(2)
+    col1.write("Largest components:")
+    col1.dataframe(pd.DataFrame({'Proteins': analytics['component_sizes']}))
+    col2.write("Largest communities:")
+    col2.dataframe(pd.DataFrame({'Proteins': analytics['community_sizes']}))
@@ -1,5 +1,5 @@
 import streamlit as st
-from backend.graph_query import ProteinGraphQuery  # твій клас з усіма запитами
+from backend.query_backend import get_query_backend
 
 def show():
     st.title("Protein EC annotation tool")
@@ -12,19 +12,10 @@ def show():
         st.session_state.top_n_value = 3
 
     if entry_id:
-        query = ProteinGraphQuery() 
+        query = get_query_backend()
 
         # --- GET PROTEIN INFO ---
-        with query.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Protein {entry: $entry})
-                RETURN p.entry AS entry, p.entry_name AS name, p.protein_names AS description, 
-                    p.ec_number AS ec_number, p.ec_predictions AS predictions
-                """,
-                entry=entry_id
-            )
-            protein = result.single()
+        protein = query.protein_info(entry_id)
 
         if protein:
             st.subheader("Protein information")
@@ -35,36 +26,26 @@ def show():
 
             # --- IF NO EC NUMBER ---
             if not protein['ec_number']:
-                st.warning("No EC Number available. You can run prediction.")
-
                 top_n = st.slider("Select top N predictions", min_value=1, max_value=10, value=st.session_state.top_n_value)
                 st.session_state.top_n_value = top_n
 
-                if st.button("Predict EC Numbers"):
-                    st.session_state.predict_clicked = True
+                # --- PRECOMPUTED PREDICTIONS ---
+                if protein['predictions']:
+                    st.subheader("Top-N Predicted EC Numbers")
+                    weights = protein['prediction_weights'] or []
+                    st.table({"EC Number": protein['predictions'][:top_n],
+                              "Weight": [round(weight, 4) for weight in weights[:top_n]]})
+
+                else:
+                    st.warning("No EC Number available. You can run prediction.")
+
+                    if st.button("Predict EC Numbers"):
+                        st.session_state.predict_clicked = True
 
-                # --- PERFORM PREDICTION ---
-                if st.session_state.predict_clicked:
-                    with query.driver.session() as session:
-                        result = session.run(
-                            """
-                            MATCH (p:Protein {entry: $entry_id})-[r:SIMILARITY]-(neighbor)
-                            WHERE r.weight >= $threshold AND neighbor.ec_number IS NOT NULL
-                            RETURN neighbor.ec_number AS ec, r.weight AS weight
-                            """,
-                            entry_id=entry_id, threshold=0.2
-                        )
-                        from collections import defaultdict
-                        ec_weights = defaultdict(float)
-                        for record in result:
-                            ec_raw = record["ec"]
-                            weight = record["weight"]
-                            ec_list = [ec.strip() for ec in ec_raw.split(';')]
-                            for ec in ec_list:
-                                ec_weights[ec] += weight
-                        filtered_ecs = [(ec, weight) for ec, weight in ec_weights.items() if weight >= 0.1]
-                        sorted_ecs = sorted(filtered_ecs, key=lambda x: x[1], reverse=True)
-                        top_ecs = sorted_ecs[:st.session_state.top_n_value]
+                    # --- PERFORM PREDICTION ---
+                    if st.session_state.predict_clicked:
+                        top_ecs = query.predict_ec(entry_id, similarity_threshold=0.2,
+                                                   top_n=st.session_state.top_n_value, min_weight=0.1)
 
                         if top_ecs:
                             st.subheader("Top-N Predicted EC Numbers")
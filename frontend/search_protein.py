@@ -1,14 +1,46 @@
+import re
 import streamlit as st
-from backend.graph_query import ProteinGraphQuery
+from backend.query_backend import get_domain_index, get_query_backend
+from backend.graph_layout import PRESET_LAYOUT
 from st_link_analysis import st_link_analysis, NodeStyle, EdgeStyle
 import pandas as pd
 
 
 COMPONENT_KEY = "PROTEIN_GRAPH"
+# Expansion steps that can be undone; older diffs are dropped
+MAX_HISTORY = 20
+
+
+def place_nodes(nodes, positions):
+    # Attach the precomputed layout coordinates to the node elements
+    for node in nodes:
+        position = positions.get(node["data"]["id"])
+        if position:
+            node["position"] = position
+    return nodes
+
 
 def show():
     st.title("Search protein")
 
+    # --- DOMAIN-SET SCREENING ---
+    with st.expander("Find proteins by InterPro domains"):
+        domain_text = st.text_input("InterPro IDs (separated by spaces, commas or semicolons):")
+        col1, col2 = st.columns(2)
+        domain_threshold = col1.slider("Minimum Jaccard similarity:", 0.0, 1.0, 0.3, step=0.05)
+        domain_top_k = col2.number_input("Maximum results:", min_value=1, value=50, step=10)
+        domains = [domain for domain in re.split(r"[\s,;]+", domain_text) if domain]
+        if domains:
+            index = get_domain_index()
+            if index is None:
+                st.warning("The domain index is not ready yet.")
+            else:
+                matches = index.search(domains, similarity_threshold=domain_threshold, top_k=domain_top_k)
+                if matches:
+                    st.dataframe(pd.DataFrame(matches))
+                else:
+                    st.write("No protein reaches this similarity.")
+
     st.write("You can search by **Entry ID**, **Protein Name**, or both.")
 
     # --- INPUT ---
@@ -30,10 +62,14 @@ def show():
 
         if st.session_state.graph_history:
             if st.button("Go back"):
-                last_graph = st.session_state.graph_history.pop()
-                st.session_state.current_nodes = last_graph["nodes"]
-                st.session_state.current_edges = last_graph["edges"]
-                st.session_state.back_pressed = True 
+                # Undo the last expansion by removing what it added
+                last_diff = st.session_state.graph_history.pop()
+                added_nodes, added_edges = set(last_diff["nodes"]), set(last_diff["edges"])
+                st.session_state.current_nodes = [
+                    node for node in st.session_state.current_nodes if node["data"]["id"] not in added_nodes]
+                st.session_state.current_edges = [
+                    edge for edge in st.session_state.current_edges if edge["data"]["id"] not in added_edges]
+                st.session_state.back_pressed = True
                 st.experimental_rerun()
 
 
@@ -47,10 +83,13 @@ def show():
             "edges": st.session_state.current_edges
         }
 
+        # Preset layout when every node came with precomputed coordinates
+        placed = all("position" in node for node in elements["nodes"])
+
         st.subheader("Graph Visualization:")
         event = st_link_analysis(
             elements,
-            layout="cose",
+            layout=PRESET_LAYOUT if placed else "cose",
             node_styles=node_styles,
             edge_styles=edge_styles,
             node_actions=['expand'],
@@ -59,53 +98,71 @@ def show():
         )
 
         # --- DOUBLE CLICK EVENT ---
-        if event and event.get("action") == "expand":
+        # The component keeps returning its last event, so each one is handled once
+        if event and event.get("action") == "expand" \
+                and event.get("timestamp") != st.session_state.get("last_expand"):
+            st.session_state.last_expand = event.get("timestamp")
             selected_node = event["data"]["node_ids"][0]
             st.info(f"Double Clicked Node: {selected_node}")
             
 
-            st.session_state.graph_history.append({
-                "nodes": st.session_state.current_nodes.copy(),
-                "edges": st.session_state.current_edges.copy()
-            })
-            
-            st.session_state.current_nodes = []
-            st.session_state.current_edges = []
-
+            # Only proteins and edges the view does not show yet are fetched
+            known_nodes = {node["data"]["id"] for node in st.session_state.current_nodes}
+            known_edges = {frozenset((edge["data"]["source"], edge["data"]["target"]))
+                           for edge in st.session_state.current_edges}
 
-            query = ProteinGraphQuery()
-            sub_data = query.get_neighbors_by_id(selected_node)
+            query = get_query_backend()
+            sub_data = query.expand_protein(selected_node, known_nodes)
+            positions = query.get_layout_positions([neighbor['entry'] for neighbor in sub_data['neighbors']]) \
+                if sub_data else {}
             query.close()
 
-            # + nodes
-            st.session_state.current_nodes.append({
-                "data": {"id": sub_data['protein']['entry'], "label": "Protein", "name": sub_data['protein']['name']}
-            })
-
-            # + neighbors
-            for neighbor in sub_data['neighbors']:
-                st.session_state.current_nodes.append({
-                    "data": {"id": neighbor['entry'], "label": "Protein", "name": neighbor['name']}
+            new_nodes, new_edges = [], []
+            if sub_data:
+                # + new neighbors
+                for neighbor in sub_data['neighbors']:
+                    new_nodes.append({
+                        "data": {"id": neighbor['entry'], "label": "Protein", "name": neighbor['name']}
+                    })
+
+                # + edges not drawn yet
+                for rel in sub_data['edges']:
+                    if frozenset((rel['source'], rel['target'])) in known_edges:
+                        continue
+                    new_edges.append({
+                        "data": {"id": f"{rel['source']}-{rel['target']}",
+                                "label": f"Similarity {rel['weight']:.2f}",
+                                "source": rel['source'],
+                                "target": rel['target']}}
+                    )
+
+            if new_nodes or new_edges:
+                st.session_state.current_nodes.extend(place_nodes(new_nodes, positions))
+                st.session_state.current_edges.extend(new_edges)
+                st.session_state.graph_history.append({
+                    "nodes": [node["data"]["id"] for node in new_nodes],
+                    "edges": [edge["data"]["id"] for edge in new_edges],
                 })
-
-            # + edges
-            for rel in sub_data['edges']:
-                st.session_state.current_edges.append({
-                    "data": {"id": f"{rel['source']}-{rel['target']}",
-                            "label": f"Similarity {rel['weight']:.2f}",
-                            "source": rel['source'],
-                            "target": rel['target']}}
-                )
-
-            st.experimental_rerun()
+                del st.session_state.graph_history[:-MAX_HISTORY]
+                st.experimental_rerun()
 
     # --- INITIAL LOAD ---
     elif (entry_id or protein_name or protein_key) and not st.session_state.get('back_pressed'):
-        query = ProteinGraphQuery()
+        query = get_query_backend()
+
+        # --- KEYWORD MATCHES ---
+        if protein_key and not (entry_id or protein_name):
+            page = st.number_input("Keyword results page:", min_value=1, value=1, step=1)
+            matches = query.search_candidates(protein_key, page=page - 1, page_size=10)
+            if matches:
+                st.dataframe(pd.DataFrame(matches))
+                entry_id = st.selectbox("Protein to display:", [match['entry'] for match in matches])
+                if not st.button("Show graph"):
+                    return
+
         data = query.search_protein(entry_id=entry_id if entry_id else None,
                                     protein_name=protein_name if protein_name else None,
                                     protein_key=protein_key if protein_key else None)
-        query.close()
 
         if data:
             nodes = []
@@ -140,8 +197,12 @@ def show():
                 })
 
 
+            place_nodes(nodes, query.get_layout_positions([node["data"]["id"] for node in nodes]))
+            query.close()
+
             st.session_state.current_nodes = nodes.copy()
             st.session_state.current_edges = edges.copy()
             st.experimental_rerun()
         else:
+            query.close()
             st.warning("No matching protein found.")
\ No newline at end of file
@@ -1,5 +1,7 @@
 import streamlit as st
-from backend.graph_query import ProteinGraphQuery
+from backend.graph_layout import PRESET_LAYOUT
+from backend.graph_sampling import SAMPLING_STRATEGIES
+from backend.query_backend import get_query_backend
 from st_link_analysis import st_link_analysis, NodeStyle, EdgeStyle
 
 def show():
@@ -7,22 +9,36 @@ def show():
 
     st.write("Displaying a sample of the full protein-protein interaction graph.")
 
+    strategy = st.selectbox("Sampling strategy:", SAMPLING_STRATEGIES, index=1)
     limit = st.slider("Number of proteins to visualize:", 50, 500, 100, step=50)
 
-    query = ProteinGraphQuery()
-    proteins, edges = query.get_full_graph(limit=limit)
-    query.close()
+    # The sample grows page by page; changing the strategy or page size starts over
+    sample = st.session_state.get("graph_sample")
+    if sample is None or sample["key"] != (strategy, limit):
+        sample = {"key": (strategy, limit), "proteins": {}, "edges": [], "exhausted": False}
+        st.session_state["graph_sample"] = sample
+    load_more = st.button("Load more proteins", disabled=sample["exhausted"])
+
+    if not sample["proteins"] or load_more:
+        query = get_query_backend()
+        proteins, edges = query.get_graph_sample(budget=limit, strategy=strategy, offset=len(sample["proteins"]))
+        query.close()
+        sample["proteins"].update(proteins)
+        sample["edges"].extend(edges)
+        sample["exhausted"] = len(proteins) < limit
 
     # Preparing data
-    nodes = [{"data": {"id": data["entry"], "label": "Protein", "name": data["name"]}} for data in proteins.values()]
-    edge_list = [{"data": {"id": f"{edge['source']}-{edge['target']}", 
-                        "label": f"Similarity {edge['weight']:.2f}" if edge['weight'] else "", 
-                        "source": edge['source'], 
-                        "target": edge['target']}} for edge in edges]
+    nodes = [{"data": {"id": data["entry"], "label": "Protein", "name": data["name"]}, "position": data["position"]}
+             for data in sample["proteins"].values()]
+    edge_list = [{"data": {"id": f"{edge['source']}-{edge['target']}",
+                        "label": f"Similarity {edge['weight']:.2f}" if edge['weight'] else "",
+                        "source": edge['source'],
+                        "target": edge['target']}} for edge in sample["edges"]]
 
     node_styles = [NodeStyle("Protein", "#FF7F3E", "name", "science")]
     edge_styles = [EdgeStyle("Similarity", caption='label', directed=False)]
     elements = {"nodes": nodes, "edges": edge_list}
 
-    st.subheader(f"Full graph visualization ({limit} proteins)")
-    st_link_analysis(elements, layout="cose", node_styles=node_styles, edge_styles=edge_styles)
+    st.subheader(f"Full graph visualization ({len(nodes)} proteins, {len(edge_list)} edges)")
+    # Positions are precomputed server-side, the browser only draws them
+    st_link_analysis(elements, layout=PRESET_LAYOUT, node_styles=node_styles, edge_styles=edge_styles)
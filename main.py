@@ -1,18 +1,41 @@
 import streamlit as st
 from frontend import home, search_protein, graph_statistics, ml_annotation, visualize_graph
-from backend.data_loader import ProteinGraph
+from backend.ingestion import STAGES, IngestionJob
+from backend.query_backend import is_ready
 
-# ---------------- Load Graph On Startup -----------------
+# ---------------- Load Graph In The Background -----------------
 @st.cache_resource
-def load_graph_once():
-    pg = ProteinGraph()
-    pg.load_data('backend/data/uniprotkb_AND_model_organism_9606_2025_02_07.tsv', sample_size=1000)
-    pg.build_graph()
-    pg.connect_neo4j()
-    pg.upload_to_neo4j()
-    return "Graph loaded!"
+def start_ingestion():
+    # One job per server process; reruns only poll its status
+    job = IngestionJob('backend/data/uniprotkb_AND_model_organism_9606_2025_02_07.tsv',
+                       sample_size=1000, similarity_threshold=0.3)
+    return job.start()
 
-load_graph_once()
+job = start_ingestion()
+status = job.status.snapshot()
+
+if status['state'] in ('pending', 'running'):
+    counters = status['counters']
+    stage = status['stage'] or STAGES[0]
+    st.sidebar.progress(STAGES.index(stage) / len(STAGES), text=f"Loading graph: {stage}")
+    st.sidebar.caption(
+        f"Rows parsed: {counters['rows_parsed']} · Pairs scored: {counters['pairs_scored']} · "
+        f"Similar pairs: {counters['similar_pairs']} · "
+        f"Edges uploaded: {counters['edges_uploaded']}/{counters['edges_total']}"
+    )
+    col1, col2 = st.sidebar.columns(2)
+    if col1.button("Refresh"):
+        st.experimental_rerun()
+    if col2.button("Cancel"):
+        job.cancel()
+elif status['state'] in ('failed', 'cancelled'):
+    if status['state'] == 'failed':
+        st.sidebar.error(f"Graph loading failed: {status['error']}")
+    else:
+        st.sidebar.warning("Graph loading was cancelled.")
+    if st.sidebar.button("Retry"):
+        start_ingestion.clear()
+        st.experimental_rerun()
 
 st.sidebar.title("Navigation")
 page = st.sidebar.selectbox(
@@ -22,7 +45,10 @@ page = st.sidebar.selectbox(
 
 
 # Routing
-if page == "Home":
+if page != "Home" and not is_ready():
+    # Nothing to read yet: the first graph is still being ingested
+    st.info("The protein graph is still loading, please check back shortly.")
+elif page == "Home":
     home.show()
 elif page == "Visualize graph":
     visualize_graph.show()